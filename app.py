@@ -1,12 +1,26 @@
-from flask import Flask, request, render_template_string, jsonify, session
+from flask import Flask, request, render_template_string, jsonify, session, Response
+from werkzeug.utils import secure_filename
 import os
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
+from functools import wraps
 from pathlib import Path
 
 
 from config import Config
+from core.filters import SearchFilter
+from core.http_cache import compress_payload, make_etag
+from core.index_registry import IndexRegistry
+from core.models import SearchResponse
 from core.pdf_processor import PDFProcessor
-from core.search_engine import SearchEngine
+from core.profiling import SamplingProfiler, SlowQueryLog, StageTimer
+from core.reranker import Reranker
+from core.search_engine import SearchEngine, rescore_with_shared_idf
+from core.sharding import ShardedSearchEngine
 from core.utils import Validator, PDFProcessingError, SearchError, ValidationError, setup_logger
 
 
@@ -22,7 +36,198 @@ pdf_processor = PDFProcessor(
     chunk_size=Config.CHUNK_SIZE,
     overlap=Config.CHUNK_OVERLAP
 )
-search_engine = SearchEngine()
+
+
+def create_search_engine():
+    if Config.SEARCH_SHARDS > 1:
+        return ShardedSearchEngine(num_shards=Config.SEARCH_SHARDS, slots=Config.SEARCH_SHARD_SLOTS)
+    return SearchEngine()
+
+
+# Sharded aramada iş shard süreçlerinde yapılır; çok dökümanlı sorgular dökümanları paralel tarar
+search_executor = None
+if Config.SEARCH_SHARDS > 1:
+    search_executor = ThreadPoolExecutor(
+        max_workers=Config.SEARCH_DOCUMENT_WORKERS,
+        thread_name_prefix='document-search'
+    )
+
+
+index_registry = IndexRegistry(
+    create_search_engine,
+    pdf_processor,
+    Config.PROCESSED_FOLDER,
+    memory_budget_bytes=Config.INDEX_MEMORY_BUDGET
+)
+
+
+reranker = None
+if Config.RERANK_ENABLED:
+    if Reranker.is_supported():
+        reranker = Reranker(
+            Config.RERANK_MODEL,
+            batch_size=Config.RERANK_BATCH_SIZE,
+            timeout=Config.RERANK_TIMEOUT,
+            workers=Config.RERANK_WORKERS,
+            cache_size=Config.RERANK_CACHE_SIZE,
+            max_pending_batches=Config.RERANK_MAX_PENDING_BATCHES
+        )
+    else:
+        logger.warning("sentence-transformers kurulu değil, yeniden sıralama devre dışı")
+
+
+slow_query_log = SlowQueryLog(Config.SLOW_QUERY_LOG, threshold=Config.SLOW_QUERY_THRESHOLD)
+request_profiler = None
+if Config.PROFILING_ENABLED:
+    request_profiler = SamplingProfiler(
+        Config.PROFILE_FOLDER,
+        keep=Config.PROFILE_KEEP,
+        interval=Config.PROFILE_INTERVAL
+    )
+
+
+def profiled(name):
+    """Profil açıksa endpoint'i örneklemeli profilleyici ile sarar"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request_profiler is None:
+                return view(*args, **kwargs)
+            with request_profiler.profile(name):
+                return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def warm_start():
+    """Açılışta işlenmiş indeksleri ve re-ranker modelini önceden yükler; indeksler bitene kadar /healthz 503 döner"""
+    if reranker:
+        reranker.warm_up()
+    
+    if not Config.PRELOAD_ENABLED:
+        index_registry.ready = True
+        return
+    
+    threading.Thread(
+        target=index_registry.preload,
+        kwargs={'max_documents': Config.PRELOAD_MAX_DOCUMENTS, 'workers': Config.PRELOAD_WORKERS},
+        name='index-warm-start',
+        daemon=True
+    ).start()
+
+
+def resolve_processed_file(document=None):
+    """İstekteki döküman adını (yoksa oturumdaki dökümanı) .pkl dosya adına çevirir"""
+    if document:
+        name = secure_filename(document)
+        return name if name.endswith('.pkl') else f"{name}.pkl"
+    return session.get('processed_file')
+
+
+def load_search_engines(processed_files, stack):
+    """Motorları istek boyunca kiralar; stack kapanınca bırakılırlar"""
+    engines = []
+    for processed_file in processed_files:
+        search_engine = stack.enter_context(index_registry.lease(processed_file))
+        if not search_engine:
+            raise SearchError(f"İşlenmiş PDF bulunamadı: {processed_file.rsplit('.', 1)[0]}")
+        engines.append((processed_file, search_engine))
+    return engines
+
+
+def read_search_request():
+    """POST için JSON gövdesini, GET için query string'i aynı yapıya çevirir"""
+    if request.method == 'POST':
+        return request.get_json(silent=True) or {}
+    
+    args = request.args
+    data = {
+        'query': args.get('query', ''),
+        'omit_preview': args.get('omit_preview', ''),
+        'filters': {
+            key: args[key]
+            for key in ('page_from', 'page_to', 'uploaded_after', 'uploaded_before', 'tags')
+            if key in args
+        }
+    }
+    if args.get('documents'):
+        data['documents'] = [document for document in args['documents'].split(',') if document.strip()]
+    return data
+
+
+def parse_flag(value):
+    """JSON'daki true/1 ve query string'deki "1"/"true" değerlerini aynı şekilde yorumlar"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def search_documents(engines, query, search_filter):
+    """
+    Her dökümanda filtreli top-k arar ve sonuçları tek bir top-k listesinde birleştirir.
+    Re-ranker açıksa önce RERANK_CANDIDATES aday toplanır, yalnızca bunlar yeniden sıralanır.
+    """
+    start_time = time.time()
+    timer = StageTimer()
+    candidate_count = Config.RERANK_CANDIDATES if reranker else Config.MAX_SEARCH_RESULTS
+    
+    def search_one(item):
+        _, search_engine = item
+        return search_engine.search(
+            query=query,
+            max_results=candidate_count,
+            min_similarity=Config.MIN_SIMILARITY,
+            search_filter=search_filter
+        )
+    
+    if search_executor and len(engines) > 1:
+        responses = list(search_executor.map(search_one, engines))
+    else:
+        responses = [search_one(item) for item in engines]
+    
+    results = []
+    for (processed_file, search_engine), response in zip(engines, responses):
+        results.extend(response.results)
+        
+        slow_query_log.record(
+            query=query,
+            document=processed_file.rsplit('.', 1)[0],
+            chunk_count=search_engine.current_document.get_chunk_count(),
+            search_time=response.search_time,
+            stage_timings=response.stage_timings,
+            result_count=response.total_found
+        )
+    timer.lap('search')
+    
+    # Her dökümanın kendi IDF'i var; birleştirmeden önce skorlar ortak IDF ile hesaplanır
+    results = rescore_with_shared_idf([engine for _, engine in engines], query, results)
+    timer.lap('rescore')
+    top_results = heapq.nlargest(candidate_count, results, key=lambda result: result.similarity_score)
+    timer.lap('merge')
+    if reranker:
+        top_results = reranker.rerank(query, top_results)
+        timer.lap('rerank')
+    
+    top_results = top_results[:Config.MAX_SEARCH_RESULTS]
+    search_response = SearchResponse(
+        query=query,
+        results=top_results,
+        search_time=time.time() - start_time,
+        stage_timings=timer.timings
+    )
+    
+    # Döküman başına kayıtlar tek tek eşiği aşmasa da isteğin toplamı (re-rank dahil) ayrıca kontrol edilir;
+    # tek dökümanlı ve re-rank'siz istekte bu, döküman kaydının tekrarı olurdu
+    if len(engines) > 1 or reranker:
+        slow_query_log.record(
+            query=query,
+            document=','.join(processed_file.rsplit('.', 1)[0] for processed_file, _ in engines),
+            chunk_count=sum(engine.current_document.get_chunk_count() for _, engine in engines),
+            search_time=search_response.search_time,
+            stage_timings=search_response.stage_timings,
+            result_count=search_response.total_found
+        )
+    return search_response
 
 # HTML Template
 HTML_TEMPLATE = '''
@@ -142,7 +347,7 @@ HTML_TEMPLATE = '''
         <p>Chunk Sayısı: {{ session.get('chunk_count', 0) }}</p>
         
         <div style="margin: 20px 0;">
-            <input type="text" class="search-box" id="searchQuery" placeholder="Arama yapın...">
+            <input type="text" class="search-box" id="searchQuery" placeholder='Arama yapın... ("tam ifade", kelime NEAR/3 kelime)'>
             <button class="search-btn" onclick="performSearch()">Ara</button>
         </div>
         
@@ -191,11 +396,8 @@ HTML_TEMPLATE = '''
 
             document.getElementById('searchLoading').style.display = 'block';
 
-            fetch('/search', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({query: query})
-            })
+            // GET: tarayıcı önbelleği ETag ile doğrular, aynı sorgu 304 ile döner
+            fetch('/search?omit_preview=1&query=' + encodeURIComponent(query))
             .then(response => response.json())
             .then(data => {
                 document.getElementById('searchLoading').style.display = 'none';
@@ -226,7 +428,7 @@ HTML_TEMPLATE = '''
                 const score = (result.similarity_score * 100).toFixed(1);
                 html += '<div class="result">';
                 html += '<div style="display: flex; justify-content: space-between; margin-bottom: 10px;">';
-                html += '<strong>Sonuç #' + result.rank + '</strong>';
+                html += '<strong>Sonuç #' + result.rank + (result.page_number ? ' · Sayfa ' + result.page_number : '') + '</strong>';
                 html += '<span class="similarity-score">' + score + '% benzerlik</span>';
                 html += '</div>';
                 html += '<div>' + result.text + '</div>';
@@ -261,6 +463,7 @@ def index():
     return render_template_string(HTML_TEMPLATE)
 
 @app.route('/upload', methods=['POST'])
+@profiled('upload')
 def upload_file():
     """PDF dosyası yükleme endpoint'i"""
     try:
@@ -271,13 +474,14 @@ def upload_file():
         
        
         filename = Validator.validate_file(file, Config.ALLOWED_EXTENSIONS, Config.MAX_FILE_SIZE)
+        tags = Validator.validate_tags(request.form.get('tags', ''))
         
         
         filepath = Config.UPLOAD_FOLDER / filename
         file.save(filepath)
         
         
-        processed_doc, error = pdf_processor.process_pdf(filepath, filename.rsplit('.', 1)[0])
+        processed_doc, chunk_texts, error = pdf_processor.process_pdf_with_texts(filepath, filename.rsplit('.', 1)[0])
         
         if error:
             
@@ -286,11 +490,14 @@ def upload_file():
             return jsonify({'success': False, 'message': error})
         
         
-        search_engine.index_document(processed_doc)
+        processed_doc.tags = tags
+        search_engine = create_search_engine()
+        search_engine.index_document(processed_doc, chunk_texts)
         
         
         processed_path = Config.PROCESSED_FOLDER / f"{processed_doc.filename}.pkl"
         pdf_processor.save_processed_document(processed_doc, processed_path)
+        index_registry.register(processed_path.name, search_engine)
         
         
         session['current_pdf'] = filename
@@ -314,44 +521,65 @@ def upload_file():
         logger.error(f"Upload hatası: {e}")
         return jsonify({'success': False, 'message': f'Dosya yükleme hatası: {str(e)}'})
 
-@app.route('/search', methods=['POST'])
+@app.route('/search', methods=['GET', 'POST'])
+@profiled('search')
 def search():
     """Arama endpoint'i"""
     try:
-        data = request.get_json()
+        data = read_search_request()
         query = data.get('query', '')
+        omit_preview = parse_flag(data.get('omit_preview', False))
         
         
         query = Validator.validate_search_query(query)
+        search_filter = SearchFilter.from_dict(data.get('filters'))
         
         
-        if not session.get('processed_file'):
+        if data.get('documents') is not None:
+            documents = Validator.validate_documents(data['documents'], Config.MAX_SEARCH_DOCUMENTS)
+            processed_files = [resolve_processed_file(document) for document in documents]
+        elif session.get('processed_file'):
+            processed_files = [session['processed_file']]
+        else:
             return jsonify({'success': False, 'message': 'Önce PDF yükleyin'})
         
         
-        if not search_engine.current_document:
-            processed_path = Config.PROCESSED_FOLDER / session['processed_file']
-            processed_doc = pdf_processor.load_processed_document(processed_path)
+        with ExitStack() as stack:
+            engines = load_search_engines(processed_files, stack)
             
-            if not processed_doc:
-                return jsonify({'success': False, 'message': 'İşlenmiş PDF bulunamadı'})
+            # ETag indeks sürümü + sorgu + seçeneklerden türetilir; GET tekrarlarında arama yapılmadan 304 döner
+            etag = make_etag(
+                [search_engine.get_index_version() for _, search_engine in engines],
+                query,
+                data.get('filters'),
+                omit_preview,
+                Config.MAX_SEARCH_RESULTS,
+                reranker is not None
+            )
+            if request.method == 'GET' and request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                cacheable = True
+            else:
+                search_response = search_documents(engines, query, search_filter)
+                response = jsonify({
+                    'success': True,
+                    'message': f'{search_response.total_found} sonuç bulundu',
+                    'results': [result.to_dict(include_preview=not omit_preview) for result in search_response.results],
+                    'search_time': search_response.search_time,
+                    'query': query
+                })
+                # Re-ranker süre aşımında ilk aşama sırası döner; bu geçici yanıt önbelleğe alınmaz
+                cacheable = reranker is None or all(
+                    result.rerank_score is not None for result in search_response.results
+                )
             
-            search_engine.index_document(processed_doc)
-        
-        
-        search_response = search_engine.search(
-            query=query,
-            max_results=Config.MAX_SEARCH_RESULTS,
-            min_similarity=Config.MIN_SIMILARITY
-        )
-        
-        return jsonify({
-            'success': True,
-            'message': f'{search_response.total_found} sonuç bulundu',
-            'results': [result.to_dict() for result in search_response.results],
-            'search_time': search_response.search_time,
-            'query': query
-        })
+            response.vary.add('Cookie')
+            if cacheable:
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            else:
+                response.headers['Cache-Control'] = 'no-store'
+            return response
         
     except ValidationError as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -361,6 +589,60 @@ def search():
         logger.error(f"Arama hatası: {e}")
         return jsonify({'success': False, 'message': f'Arama hatası: {str(e)}'})
 
+@app.after_request
+def compress_search_response(response):
+    """Büyük /search yanıtlarını Accept-Encoding'e göre gzip/brotli ile sıkıştırır"""
+    if request.path != '/search' or response.status_code != 200 or response.direct_passthrough:
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    if 'Content-Encoding' in response.headers:
+        return response
+    
+    payload = response.get_data()
+    if len(payload) < Config.COMPRESS_MIN_SIZE:
+        return response
+    
+    compressed, encoding = compress_payload(
+        payload,
+        request.accept_encodings,
+        gzip_level=Config.GZIP_LEVEL,
+        brotli_quality=Config.BROTLI_QUALITY
+    )
+    if compressed is not None:
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """İndeks istatistikleri endpoint'i"""
+    processed_file = resolve_processed_file(request.args.get('document'))
+    if not processed_file:
+        return jsonify({'success': False, 'message': 'İndekslenmiş döküman yok'})
+    
+    with index_registry.lease(processed_file) as search_engine:
+        if not search_engine:
+            return jsonify({'success': False, 'message': 'İndekslenmiş döküman yok'})
+        
+        statistics = search_engine.get_search_statistics()
+        statistics['top_terms'] = search_engine.get_top_terms(Config.STATS_TOP_TERMS)
+    
+    return jsonify({'success': True, 'statistics': statistics})
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """İndeksler belleğe yüklenene kadar 503, sonrasında 200 döner"""
+    status = index_registry.get_status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
+# Debug modunda reloader'ın izleyici süreci ve shard süreçlerinin yeniden içe aktardığı
+# ana modül (__mp_main__) indeks yüklemez
+is_reloader_parent = __name__ == '__main__' and Config.DEBUG and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+if not is_reloader_parent and __name__ != '__mp_main__':
+    warm_start()
+
 if __name__ == '__main__':
     logger.info("PDF RAG Chatbot başlatılıyor...")
     app.run(debug=Config.DEBUG, host='0.0.0.0', port=5000)
@@ -24,6 +24,47 @@ class Config:
     # Arama
     MAX_SEARCH_RESULTS = 5
     MIN_SIMILARITY = 0.01
+    MAX_SEARCH_DOCUMENTS = 20
+    # Sharding döküman başınadır: bellekteki her döküman SEARCH_SHARDS süreç başlatır
+    SEARCH_SHARDS = int(os.environ.get('SEARCH_SHARDS', '1'))
+    # Sharded bir dökümanda aynı anda işlenebilecek sorgu sayısı
+    SEARCH_SHARD_SLOTS = int(os.environ.get('SEARCH_SHARD_SLOTS', '4'))
+    # Sharded aramada çok dökümanlı sorguların dökümanları paralel tarayan thread sayısı
+    SEARCH_DOCUMENT_WORKERS = int(os.environ.get('SEARCH_DOCUMENT_WORKERS', '8'))
+    
+    # İki aşamalı arama: TF-IDF adayları yerel cross-encoder ile yeniden sıralanır
+    RERANK_ENABLED = os.environ.get('RERANK_ENABLED', 'False').lower() == 'true'
+    RERANK_MODEL = os.environ.get('RERANK_MODEL', 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1')
+    RERANK_CANDIDATES = 30
+    RERANK_BATCH_SIZE = 16
+    RERANK_TIMEOUT = float(os.environ.get('RERANK_TIMEOUT', '1.0'))
+    RERANK_WORKERS = 2
+    RERANK_CACHE_SIZE = 10000
+    RERANK_MAX_PENDING_BATCHES = 8
+    
+    # Açılışta indeks ön yükleme
+    PRELOAD_ENABLED = os.environ.get('PRELOAD_ENABLED', 'True').lower() == 'true'
+    PRELOAD_MAX_DOCUMENTS = int(os.environ.get('PRELOAD_MAX_DOCUMENTS', '20'))
+    PRELOAD_WORKERS = int(os.environ.get('PRELOAD_WORKERS', '4'))
+    
+    # Bellekte tutulan indekslerin toplam üst sınırı; aşılınca LRU tahliye
+    INDEX_MEMORY_BUDGET = int(os.environ.get('INDEX_MEMORY_BUDGET_MB', '1024')) * 1024 * 1024
+    
+    # Yavaş sorgu logu ve örneklemeli profil
+    SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD', '0.5'))
+    SLOW_QUERY_LOG = BASE_DIR / 'data' / 'logs' / 'slow_queries.log'
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILE_FOLDER = BASE_DIR / 'data' / 'profiles'
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '20'))
+    PROFILE_INTERVAL = 0.005
+    
+    # /search yanıt sıkıştırma (gzip, brotli kuruluysa br)
+    COMPRESS_MIN_SIZE = 1024
+    GZIP_LEVEL = 6
+    BROTLI_QUALITY = 5
+    
+    # İstatistik
+    STATS_TOP_TERMS = 10
     
     @classmethod
     def init_folders(cls):
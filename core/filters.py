@@ -0,0 +1,115 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+
+from .utils import ValidationError, Validator
+
+
+class ChunkAttributes:
+    """Filtrelenebilir chunk öznitelikleri; chunk sırasıyla hizalı sütun dizileri"""
+
+    UNKNOWN_PAGE = -1
+
+    def __init__(self, page_numbers):
+        self.page_numbers = page_numbers
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        page_numbers = np.fromiter(
+            (chunk.page_number if chunk.page_number is not None else cls.UNKNOWN_PAGE for chunk in chunks),
+            dtype=np.int32,
+            count=len(chunks)
+        )
+        return cls(page_numbers=page_numbers)
+
+    def nbytes(self):
+        return self.page_numbers.nbytes
+
+
+@dataclass
+class SearchFilter:
+    """
+    /search isteğindeki filtreler. Döküman düzeyindeki koşullar (yüklenme
+    tarihi, etiketler) dökümanı taramadan eler; sayfa aralığı ise skorlamadan
+    önce chunk maskesi olarak uygulanır.
+    """
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    uploaded_after: Optional[datetime] = None
+    uploaded_before: Optional[datetime] = None
+    tags: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data):
+        if not data:
+            return cls()
+
+        if not isinstance(data, dict):
+            raise ValidationError("Filtreler bir nesne olmalı")
+
+        search_filter = cls(
+            page_from=cls._parse_page(data.get('page_from')),
+            page_to=cls._parse_page(data.get('page_to')),
+            uploaded_after=cls._parse_date(data.get('uploaded_after')),
+            uploaded_before=cls._parse_date(data.get('uploaded_before')),
+            tags=Validator.validate_tags(data.get('tags'))
+        )
+
+        if search_filter.page_from and search_filter.page_to and search_filter.page_from > search_filter.page_to:
+            raise ValidationError("Sayfa aralığı geçersiz")
+
+        return search_filter
+
+    @staticmethod
+    def _parse_page(value):
+        if value in (None, ''):
+            return None
+        try:
+            page = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError("Sayfa numarası tamsayı olmalı")
+        if page < 1:
+            raise ValidationError("Sayfa numarası 1 veya daha büyük olmalı")
+        return page
+
+    @staticmethod
+    def _parse_date(value):
+        if value in (None, ''):
+            return None
+        try:
+            parsed = datetime.fromisoformat(str(value))
+        except ValueError:
+            raise ValidationError("Tarih ISO formatında olmalı (YYYY-MM-DD)")
+        
+        # processed_at yerel saatte ve saat dilimsiz tutulur; saat dilimli değerler yerel saate çevrilir
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed
+
+    def has_page_range(self):
+        return self.page_from is not None or self.page_to is not None
+
+    def matches_document(self, document):
+        """Döküman düzeyindeki koşullar; sağlanmazsa döküman hiç skorlanmaz"""
+        if self.uploaded_after and document.processed_at < self.uploaded_after:
+            return False
+        if self.uploaded_before and document.processed_at > self.uploaded_before:
+            return False
+        if self.tags and not set(self.tags).issubset(document.tags or []):
+            return False
+        return True
+
+    def chunk_mask(self, attributes):
+        """Sayfa aralığını sağlayan chunk'lar için bool maske; koşul yoksa None"""
+        if not self.has_page_range():
+            return None
+
+        pages = attributes.page_numbers
+        mask = pages != ChunkAttributes.UNKNOWN_PAGE
+        if self.page_from is not None:
+            mask &= pages >= self.page_from
+        if self.page_to is not None:
+            mask &= pages <= self.page_to
+        return mask
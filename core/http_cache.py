@@ -0,0 +1,34 @@
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def supported_encodings():
+    """Tercih sırasına göre desteklenen Content-Encoding değerleri"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compress_payload(data, accept_encodings, gzip_level=6, brotli_quality=5):
+    """
+    Accept-Encoding başlığına göre veriyi sıkıştırır.
+
+    Returns:
+        Tuple[sıkıştırılmış_veri, encoding] veya istemci desteklemiyorsa (None, None)
+    """
+    encoding = accept_encodings.best_match(supported_encodings())
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality), encoding
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=gzip_level), encoding
+    return None, None
+
+
+def make_etag(*parts):
+    """Yanıtı belirleyen tüm girdilerden (indeks sürümleri, sorgu, seçenekler) ETag üretir"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
@@ -0,0 +1,257 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .utils import SearchError, setup_logger
+
+logger = setup_logger(__name__)
+
+
+class IndexRegistry:
+    """
+    İşlenmiş dökümanların aramaya hazır SearchEngine örneklerini tutar.
+
+    Bellekte tutulan indekslerin yaklaşık toplam boyutu memory_budget_bytes'ı
+    aşarsa en uzun süredir aranmayan indeksler bellekten çıkarılır; tekrar
+    istendiklerinde diskten yüklenirler. Arama yapan istekler motoru lease()
+    ile kiralar; çıkarılan ya da yerine yenisi kaydedilen bir motor, son
+    kiralayan bırakana kadar kapatılmaz. .pkl dosyası başka bir süreç (ör.
+    ingest.py ya da başka bir sunucu işçisi) tarafından değiştirilirse motor
+    sonraki get() çağrısında diskten yeniden yüklenir.
+    """
+
+    def __init__(self, engine_factory, pdf_processor, processed_folder, memory_budget_bytes=None):
+        """
+        Args:
+            engine_factory: Yeni bir SearchEngine döndüren çağrılabilir
+            pdf_processor: Kalıcı dökümanları yüklemek için PDFProcessor
+            processed_folder: .pkl dosyalarının bulunduğu klasör
+            memory_budget_bytes: Bellekteki indeksler için üst sınır (None: sınırsız)
+        """
+        self.engine_factory = engine_factory
+        self.pdf_processor = pdf_processor
+        self.processed_folder = processed_folder
+        self.memory_budget_bytes = memory_budget_bytes
+        self.ready = False
+        self.preload_errors = []
+        self.evictions = 0
+        self.resident_bytes = 0
+        self._engines = OrderedDict()
+        self._sizes = {}
+        self._mtimes = {}
+        self._loading = {}
+        self._leases = {}
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, engine, lease=False, mtime=None):
+        """mtime: motorun oluşturulduğu .pkl sürümü (verilmezse dosyanın şimdiki değişiklik zamanı)"""
+        size = engine.get_memory_usage()
+        if mtime is None:
+            mtime = self._file_mtime(name)
+
+        with self._lock:
+            previous = self._remove(name)
+
+            self._engines[name] = engine
+            self._sizes[name] = size
+            self._mtimes[name] = mtime
+            self.resident_bytes += size
+            if lease:
+                self._leases[id(engine)] = self._leases.get(id(engine), 0) + 1
+
+            evicted = self._evict_over_budget()
+            if previous is not None and previous is not engine:
+                evicted.append((name, previous))
+            to_close = [(evicted_name, evicted_engine) for evicted_name, evicted_engine in evicted
+                        if self._retire(evicted_engine)]
+
+        for evicted_name, evicted_engine in to_close:
+            evicted_engine.close()
+            logger.info(f"İndeks bellekten çıkarıldı: {evicted_name}")
+
+    def _file_mtime(self, name):
+        """.pkl dosyasının değişiklik zamanı (ns); dosya yoksa None"""
+        try:
+            return (self.processed_folder / name).stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _remove(self, name):
+        """Motoru bellekteki kayıtlardan çıkarır ve döndürür (kilit altında çağrılır)"""
+        engine = self._engines.pop(name, None)
+        self.resident_bytes -= self._sizes.pop(name, 0)
+        self._mtimes.pop(name, None)
+        return engine
+
+    def _retire(self, engine):
+        """Kiralanmamış motor hemen kapatılabilir (True); kiralanmışsa son bırakışa ertelenir (kilit altında)"""
+        if self._leases.get(id(engine)):
+            self._retired[id(engine)] = engine
+            return False
+        return True
+
+    def release(self, engine):
+        with self._lock:
+            key = id(engine)
+            self._leases[key] -= 1
+            if self._leases[key]:
+                return
+            del self._leases[key]
+            retired = self._retired.pop(key, None)
+
+        if retired is not None:
+            retired.close()
+            logger.info("Bellekten çıkarılan indeks son aramadan sonra kapatıldı")
+
+    @contextmanager
+    def lease(self, name):
+        """
+        Motoru arama süresince kiralar; bu sürede bellekten çıkarılsa bile kapatılmaz.
+        Döküman yoksa None verir.
+        """
+        engine = self.get(name, lease=True)
+        try:
+            yield engine
+        finally:
+            if engine is not None:
+                self.release(engine)
+
+    def _evict_over_budget(self):
+        """Bütçe aşıldıysa en az yakın zamanda kullanılan indeksleri çıkarır (kilit altında çağrılır)"""
+        evicted = []
+        if not self.memory_budget_bytes:
+            return evicted
+
+        # En son eklenen/kullanılan indeks tek başına bütçeyi aşsa bile bellekte kalır
+        while self.resident_bytes > self.memory_budget_bytes and len(self._engines) > 1:
+            name = next(iter(self._engines))
+            engine = self._remove(name)
+            self.evictions += 1
+            evicted.append((name, engine))
+        return evicted
+
+    def get(self, name, lease=False):
+        """
+        Dökümanın motorunu döndürür; bellekte değilse diskten yükler.
+        Aynı döküman için eşzamanlı istekler tek bir yüklemeyi bekler.
+        lease=True ise motor kiralanır ve release() ile bırakılmalıdır.
+        """
+        while True:
+            mtime = self._file_mtime(name)
+            stale = None
+            with self._lock:
+                engine = self._engines.get(name)
+                if engine is not None and self._mtimes.get(name) == mtime:
+                    self._engines.move_to_end(name)
+                    if lease:
+                        self._leases[id(engine)] = self._leases.get(id(engine), 0) + 1
+                    return engine
+
+                if engine is not None and name not in self._loading:
+                    # Dosya diskte değişmiş ya da silinmiş; bellekteki eski indeks bırakılır
+                    self._remove(name)
+                    if self._retire(engine):
+                        stale = engine
+
+                future = self._loading.get(name)
+                is_loader = future is None
+                if is_loader:
+                    future = Future()
+                    self._loading[name] = future
+
+            if stale is not None:
+                stale.close()
+                logger.info(f"İndeks diskte değişti, yeniden yüklenecek: {name}")
+
+            if is_loader:
+                break
+
+            engine = future.result()
+            if engine is None or not lease:
+                return engine
+
+            with self._lock:
+                # Yükleme bitince motor hemen çıkarılıp kapatılmış olabilir; o durumda yeniden denenir
+                if self._engines.get(name) is engine or id(engine) in self._retired:
+                    self._leases[id(engine)] = self._leases.get(id(engine), 0) + 1
+                    return engine
+
+        try:
+            engine = self._load(name, lease)
+            future.set_result(engine)
+            return engine
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(name, None)
+
+    def _load(self, name, lease=False):
+        processed_path = self.processed_folder / name
+        mtime = self._file_mtime(name)
+        if mtime is None:
+            return None
+
+        document = self.pdf_processor.load_processed_document(processed_path)
+        if not document:
+            raise SearchError(f"İşlenmiş döküman yüklenemedi: {name}")
+
+        engine = self.engine_factory()
+        needs_reindex = not engine.has_valid_index(document)
+        engine.attach_document(document)
+
+        if needs_reindex:
+            # Yeniden eğitilen indeks kaydedilir, sonraki açılışta tekrar eğitilmez
+            self.pdf_processor.save_processed_document(document, processed_path)
+            mtime = self._file_mtime(name)
+
+        self.register(name, engine, lease=lease, mtime=mtime)
+        return engine
+
+    def preload(self, max_documents=20, workers=4):
+        """
+        PROCESSED_FOLDER içindeki en son işlenmiş dökümanları paralel olarak
+        yükler ve tamamlandığında registry'yi hazır olarak işaretler.
+        Bellek bütçesi dolduğunda kalan dökümanlar ilk istekte yüklenir.
+        """
+        paths = sorted(
+            self.processed_folder.glob('*.pkl'),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True
+        )[:max_documents]
+
+        logger.info(f"Ön yükleme başlatıldı: {len(paths)} döküman")
+
+        def preload_one(path):
+            if self.memory_budget_bytes and self.resident_bytes >= self.memory_budget_bytes:
+                return
+            try:
+                self.get(path.name)
+            except Exception as e:
+                logger.error(f"Ön yükleme hatası ({path.name}): {e}")
+                self.preload_errors.append({'document': path.name, 'error': str(e)})
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            list(executor.map(preload_one, paths))
+
+        self.ready = True
+        logger.info(f"Ön yükleme tamamlandı: {len(self._engines)} döküman hazır")
+
+    def get_status(self):
+        with self._lock:
+            loaded = list(self._engines)
+            resident_bytes = self.resident_bytes
+
+        return {
+            'ready': self.ready,
+            'loaded_documents': len(loaded),
+            'documents': loaded,
+            'resident_bytes': resident_bytes,
+            'memory_budget_bytes': self.memory_budget_bytes,
+            'evictions': self.evictions,
+            'retired_in_use': len(self._retired),
+            'preload_errors': list(self.preload_errors)
+        }
@@ -10,6 +10,10 @@ class DocumentChunk:
     page_number: Optional[int] = None
     word_count: int = 0
     
+    # Sıkıştırılmış döküman metni içindeki aralık (text_store kullanıldığında)
+    offset: int = 0
+    length: int = 0
+    
     def __post_init__(self):
         if not self.word_count:
             self.word_count = len(self.text.split())
@@ -21,10 +25,60 @@ class ProcessedDocument:
     chunks: List[DocumentChunk] = field(default_factory=list)
     total_pages: int = 0
     processed_at: datetime = field(default_factory=datetime.now)
+    tags: List[str] = field(default_factory=list)
+    source_path: Optional[str] = None
     
     
     vectorizer: Any = None
     tfidf_matrix: Any = None
+    term_statistics: Any = None
+    positional_index: Any = None
+    text_store: Any = None
+    chunk_attributes: Any = None
+    
+    def __setstate__(self, state):
+        # Eski pickle'larda sonradan eklenen liste alanları bulunmaz
+        state.setdefault('tags', [])
+        self.__dict__.update(state)
+    
+    def get_chunk_text(self, chunk):
+        """Chunk metnini döndürür; sıkıştırılmış depoda yalnızca ilgili bloklar açılır"""
+        if self.text_store is not None:
+            return self.text_store.get(chunk.offset, chunk.length)
+        return chunk.text
+    
+    def get_chunk_texts(self):
+        if self.text_store is None:
+            return [chunk.text for chunk in self.chunks]
+        
+        text = self.text_store.get_text()
+        return [text[chunk.offset:chunk.offset + chunk.length] for chunk in self.chunks]
+    
+    def estimate_memory_bytes(self):
+        """Dökümanın bellekteki yaklaşık boyutu (chunk'lar, indeksler, metin deposu)"""
+        object_overhead = 120
+        size = sum(len(chunk.text) + object_overhead for chunk in self.chunks)
+        
+        if self.tfidf_matrix is not None:
+            size += self.tfidf_matrix.data.nbytes + self.tfidf_matrix.indices.nbytes + self.tfidf_matrix.indptr.nbytes
+        
+        if self.vectorizer is not None and hasattr(self.vectorizer, 'vocabulary_'):
+            size += sum(len(term) + object_overhead for term in self.vectorizer.vocabulary_)
+        
+        if self.term_statistics is not None:
+            size += self.term_statistics.nbytes()
+        
+        if self.positional_index is not None:
+            size += self.positional_index.nbytes() + len(self.positional_index.postings) * 3 * object_overhead
+        
+        if self.chunk_attributes is not None:
+            size += self.chunk_attributes.nbytes()
+        
+        if self.text_store is not None:
+            cached_blocks = min(self.text_store.cache_blocks, len(self.text_store.blocks))
+            size += self.text_store.nbytes() + cached_blocks * self.text_store.block_size
+        
+        return size
     
     def get_chunk_count(self):
         return len(self.chunks)
@@ -38,6 +92,7 @@ class ProcessedDocument:
             'chunk_count': self.get_chunk_count(),
             'total_words': self.get_total_words(),
             'total_pages': self.total_pages,
+            'tags': self.tags,
             'processed_at': self.processed_at.strftime('%Y-%m-%d %H:%M:%S')
         }
 
@@ -47,6 +102,9 @@ class SearchResult:
     chunk_text: str
     similarity_score: float
     rank: int = 0
+    document: Optional[str] = None
+    page_number: Optional[int] = None
+    rerank_score: Optional[float] = None
     
     def get_preview(self, max_length=150):
         if len(self.chunk_text) <= max_length:
@@ -62,15 +120,20 @@ class SearchResult:
         else:
             return "Düşük"
     
-    def to_dict(self):
-        return {
+    def to_dict(self, include_preview=True):
+        result = {
             'rank': self.rank,
             'chunk_id': self.chunk_id,
             'similarity_score': round(self.similarity_score, 3),
             'text': self.chunk_text,
-            'preview': self.get_preview(),
-            'confidence': self.get_confidence_level()
+            'confidence': self.get_confidence_level(),
+            'document': self.document,
+            'page_number': self.page_number,
+            'rerank_score': round(self.rerank_score, 3) if self.rerank_score is not None else None
         }
+        if include_preview:
+            result['preview'] = self.get_preview()
+        return result
 
 @dataclass
 class SearchResponse:
@@ -78,6 +141,7 @@ class SearchResponse:
     results: List[SearchResult] = field(default_factory=list)
     total_found: int = 0
     search_time: float = 0.0
+    stage_timings: Dict[str, float] = field(default_factory=dict)
     
     def __post_init__(self):
         self.total_found = len(self.results)
@@ -1,9 +1,12 @@
+import os
 import PyPDF2
 from pathlib import Path
 from datetime import datetime
 import pickle
+from bisect import bisect_right
 
 from .models import DocumentChunk, ProcessedDocument
+from .text_store import CompressedTextStore
 from .utils import TextCleaner, PDFProcessingError, setup_logger
 
 logger = setup_logger(__name__)
@@ -11,9 +14,10 @@ logger = setup_logger(__name__)
 class PDFProcessor:
     
     
-    def __init__(self, chunk_size=500, overlap=100):
+    def __init__(self, chunk_size=500, overlap=100, text_block_size=65536):
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.text_block_size = text_block_size
         self.text_cleaner = TextCleaner()
         logger.info("PDF Processor başlatıldı")
     
@@ -26,29 +30,49 @@ class PDFProcessor:
         Returns:
             Tuple[ProcessedDocument, error_message]
         """
+        processed_doc, _, error = self.process_pdf_with_texts(pdf_path, filename)
+        return processed_doc, error
+    
+    def process_pdf_with_texts(self, pdf_path, filename):
+        """
+        process_pdf ile aynı; ek olarak chunk metinlerini de döndürür. İndeksleme
+        bu listeyi kullanırsa sıkıştırılan metin hemen tekrar açılmaz.
+        
+        Returns:
+            Tuple[ProcessedDocument, List[str], error_message]
+        """
         try:
             logger.info(f"PDF işleniyor: {filename}")
             
             
             raw_text, page_count = self._extract_text_from_pdf(pdf_path)
             if not raw_text:
-                return None, "PDF'den metin çıkarılamadı"
+                return None, None, "PDF'den metin çıkarılamadı"
             
             
-            clean_text = self.text_cleaner.clean_pdf_text(raw_text)
+            clean_text, page_starts = self.text_cleaner.clean_pdf_pages(raw_text)
+            page_offsets = [start for start, _ in page_starts]
+            page_numbers = [number for _, number in page_starts]
             
             
-            text_chunks = self.text_cleaner.create_chunks(clean_text, self.chunk_size, self.overlap)
-            if not text_chunks:
-                return None, "Metin chunk'lara bölünemedi"
+            chunk_spans = self.text_cleaner.create_chunk_spans(clean_text, self.chunk_size, self.overlap)
+            if not chunk_spans:
+                return None, None, "Metin chunk'lara bölünemedi"
             
             
+            # Chunk metni ayrıca saklanmaz; örtüşen kısımlar depoda tek kopya kalır
             chunks = []
-            for i, chunk_text in enumerate(text_chunks):
+            chunk_texts = []
+            for i, (offset, length) in enumerate(chunk_spans):
+                chunk_text = clean_text[offset:offset + length]
+                chunk_texts.append(chunk_text)
                 chunk = DocumentChunk(
                     id=i,
-                    text=chunk_text,
-                    page_number=self._extract_page_number(chunk_text)
+                    text='',
+                    page_number=self._page_at(offset, page_offsets, page_numbers),
+                    word_count=len(chunk_text.split()),
+                    offset=offset,
+                    length=length
                 )
                 chunks.append(chunk)
             
@@ -57,16 +81,17 @@ class PDFProcessor:
                 filename=filename,
                 chunks=chunks,
                 total_pages=page_count,
-                processed_at=datetime.now()
+                processed_at=datetime.now(),
+                text_store=CompressedTextStore(clean_text, block_size=self.text_block_size)
             )
             
             logger.info(f"PDF başarıyla işlendi: {filename}, {len(chunks)} chunk oluşturuldu")
-            return processed_doc, None
+            return processed_doc, chunk_texts, None
             
         except Exception as e:
             error_msg = f"PDF işleme hatası: {str(e)}"
             logger.error(error_msg)
-            return None, error_msg
+            return None, None, error_msg
     
     def _extract_text_from_pdf(self, pdf_path):
         text = ""
@@ -92,18 +117,23 @@ class PDFProcessor:
         
         return text, page_count
     
-    def _extract_page_number(self, text):
-        import re
-        match = re.search(r'--- Sayfa (\d+) ---', text)
-        return int(match.group(1)) if match else None
+    def _page_at(self, offset, page_offsets, page_numbers):
+        """Temiz metindeki offset'in düştüğü sayfa numarası"""
+        position = bisect_right(page_offsets, offset)
+        return page_numbers[position - 1] if position else None
     
     def save_processed_document(self, doc, filepath):
+        # Önce geçici dosyaya yazılır; yarıda kalan kayıt mevcut indeksi bozmaz
+        temp_path = Path(f"{filepath}.tmp")
         try:
-            with open(filepath, 'wb') as f:
+            with open(temp_path, 'wb') as f:
                 pickle.dump(doc, f)
+            os.replace(temp_path, filepath)
             return True
         except Exception as e:
             logger.error(f"Döküman kaydedilemedi: {e}")
+            if temp_path.exists():
+                temp_path.unlink()
             return False
     
     def load_processed_document(self, filepath):
@@ -0,0 +1,160 @@
+import numpy as np
+
+from .query_analyzer import tokenize
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# (chunk, pozisyon) çiftleri tek bir int64 anahtarda tutulur: chunk << 32 | pozisyon
+POSITION_BITS = 32
+
+
+def _compact(values):
+    """Negatif olmayan tamsayı dizisini en küçük işaretsiz tipte saklar"""
+    max_value = int(values.max()) if values.size else 0
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return values.astype(dtype)
+    return values.astype(np.uint64)
+
+
+class PostingList:
+    """Bir terimin geçtiği chunk'lar ve her chunk içindeki pozisyonları (delta kodlu)"""
+
+    __slots__ = ('chunk_deltas', 'position_offsets', 'position_deltas')
+
+    def __init__(self, chunk_deltas, position_offsets, position_deltas):
+        self.chunk_deltas = _compact(chunk_deltas)
+        self.position_offsets = position_offsets.astype(np.uint32)
+        self.position_deltas = _compact(position_deltas)
+
+    def chunk_ids(self):
+        return np.cumsum(self.chunk_deltas, dtype=np.int64)
+
+    def keys(self):
+        """Tüm geçişleri sıralı (chunk << 32 | pozisyon) anahtarları olarak tek geçişte açar"""
+        counts = np.diff(self.position_offsets.astype(np.int64))
+        deltas = self.position_deltas.astype(np.int64)
+        running = np.cumsum(deltas)
+        
+        # Her chunk'ın ilk deltası mutlak pozisyondur; önceki chunk'ların toplamı çıkarılır
+        starts = self.position_offsets[:-1].astype(np.int64)
+        positions = running - np.repeat(running[starts] - deltas[starts], counts)
+        chunk_ids = np.repeat(self.chunk_ids(), counts)
+        return (chunk_ids << POSITION_BITS) | positions
+
+    def nbytes(self):
+        return self.chunk_deltas.nbytes + self.position_offsets.nbytes + self.position_deltas.nbytes
+
+
+class PositionalIndex:
+    """Tırnaklı ifade ve NEAR/k sorguları için pozisyonel ters indeks"""
+
+    def __init__(self):
+        self.postings = {}
+
+    @classmethod
+    def build(cls, chunk_texts):
+        index = cls()
+        vocabulary = {}
+        term_ids, chunk_ids, positions = [], [], []
+
+        for chunk_idx, text in enumerate(chunk_texts):
+            tokens = tokenize(text)
+            term_ids.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokens)
+            chunk_ids.extend([chunk_idx] * len(tokens))
+            positions.extend(range(len(tokens)))
+
+        if not vocabulary:
+            return index
+
+        # (terim, chunk, pozisyon) sırasına göre tek seferde sıralanıp delta kodlanır
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        positions = np.asarray(positions, dtype=np.int64)
+        order = np.lexsort((positions, chunk_ids, term_ids))
+        term_ids, chunk_ids, positions = term_ids[order], chunk_ids[order], positions[order]
+
+        new_term = np.ones(term_ids.size, dtype=bool)
+        new_term[1:] = term_ids[1:] != term_ids[:-1]
+        new_chunk = new_term.copy()
+        new_chunk[1:] |= chunk_ids[1:] != chunk_ids[:-1]
+
+        position_deltas = np.diff(positions, prepend=0)
+        position_deltas[new_chunk] = positions[new_chunk]
+
+        chunk_starts = np.flatnonzero(new_chunk)
+        chunk_values = chunk_ids[chunk_starts]
+        chunk_deltas = np.diff(chunk_values, prepend=0)
+        chunk_deltas[new_term[chunk_starts]] = chunk_values[new_term[chunk_starts]]
+
+        term_starts = np.flatnonzero(new_term)
+        term_ends = np.append(term_starts[1:], term_ids.size)
+        term_chunk_starts = np.searchsorted(chunk_starts, term_starts)
+        term_chunk_ends = np.append(term_chunk_starts[1:], chunk_starts.size)
+
+        tokens_by_id = [None] * len(vocabulary)
+        for token, term_id in vocabulary.items():
+            tokens_by_id[term_id] = token
+
+        for i, term_id in enumerate(term_ids[term_starts]):
+            start, end = term_starts[i], term_ends[i]
+            chunk_start, chunk_end = term_chunk_starts[i], term_chunk_ends[i]
+            offsets = np.append(chunk_starts[chunk_start:chunk_end], end) - start
+            index.postings[tokens_by_id[term_id]] = PostingList(
+                chunk_deltas[chunk_start:chunk_end],
+                offsets,
+                position_deltas[start:end]
+            )
+
+        logger.info(f"Pozisyonel indeks oluşturuldu: {len(index.postings)} terim")
+        return index
+
+    def nbytes(self):
+        return sum(posting.nbytes() for posting in self.postings.values())
+
+    def _keys(self, terms):
+        postings = [self.postings.get(term) for term in terms]
+        if not postings or any(posting is None for posting in postings):
+            return None
+        return [posting.keys() for posting in postings]
+
+    def match_phrase(self, terms):
+        """Terimlerin bu sırayla art arda geçtiği chunk indekslerini döndürür"""
+        term_keys = self._keys(terms)
+        if term_keys is None:
+            return np.zeros(0, dtype=np.int64)
+
+        # i. terimin pozisyonu i kaydırılır; ifade başlangıçları tüm terimlerde ortak anahtardır
+        starts = term_keys[0]
+        for offset, keys in enumerate(term_keys[1:], start=1):
+            positions = keys & ((1 << POSITION_BITS) - 1)
+            starts = np.intersect1d(starts, keys[positions >= offset] - offset, assume_unique=True)
+            if not starts.size:
+                break
+
+        return np.unique(starts >> POSITION_BITS)
+
+    def match_near(self, left, right, distance):
+        """İki terim arasında en fazla `distance` kelime bulunan chunk indekslerini döndürür"""
+        term_keys = self._keys([left, right])
+        if term_keys is None:
+            return np.zeros(0, dtype=np.int64)
+
+        left_keys, right_keys = term_keys
+        if not right_keys.size:
+            return np.zeros(0, dtype=np.int64)
+
+        # Sağ terimin her sol geçişten hemen önceki ve sonraki geçişi; eşit anahtar
+        # (aynı terimin aynı pozisyonu) hariç tutulur. Farklı chunk'lar arası fark
+        # 2^32'den büyük olduğundan yalnızca aynı chunk içindeki çiftler eşleşir.
+        after_slots = np.searchsorted(right_keys, left_keys, side='right')
+        before_slots = np.searchsorted(right_keys, left_keys, side='left') - 1
+
+        max_gap = distance + 1
+        after = right_keys[np.minimum(after_slots, right_keys.size - 1)]
+        before = right_keys[np.maximum(before_slots, 0)]
+        near_after = (after_slots < right_keys.size) & (after - left_keys <= max_gap)
+        near_before = (before_slots >= 0) & (left_keys - before <= max_gap)
+
+        return np.unique(left_keys[near_after | near_before] >> POSITION_BITS)
@@ -0,0 +1,145 @@
+import heapq
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class StageTimer:
+    """Bir isteğin aşamalarına harcanan süreyi (saniye) toplar"""
+
+    def __init__(self):
+        self.timings = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+
+class SlowQueryLog:
+    """Eşik süresini aşan aramaları JSON satırları olarak dosyaya yazar"""
+
+    def __init__(self, path, threshold=0.5):
+        self.path = Path(path)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, query, document, chunk_count, search_time, stage_timings, result_count):
+        if search_time < self.threshold:
+            return False
+
+        entry = {
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'query': query,
+            'document': document,
+            'chunk_count': chunk_count,
+            'search_time': round(search_time, 6),
+            'stages': {stage: round(seconds, 6) for stage, seconds in stage_timings.items()},
+            'result_count': result_count
+        }
+
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+        logger.warning(f"Yavaş sorgu ({search_time:.3f}s): '{query}' - {document}")
+        return True
+
+
+class SamplingProfiler:
+    """
+    İsteği işleyen thread'in yığınını belirli aralıklarla örnekler. Yalnızca
+    en yavaş `keep` isteğin profili diske yazılır; dosyalar flamegraph araçlarının
+    okuyabildiği "çerçeve;çerçeve;... sayı" (collapsed stack) formatındadır.
+    """
+
+    def __init__(self, folder, keep=20, interval=0.005):
+        self.folder = Path(folder)
+        self.keep = keep
+        self.interval = interval
+        self._slowest = []
+        self._lock = threading.Lock()
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """Önceki çalıştırmalardan kalan profilleri en yavaş `keep` listesine ekler, fazlasını siler"""
+        for path in self.folder.glob('*.folded'):
+            match = re.search(r'-(\d+)ms\.folded$', path.name)
+            if match:
+                heapq.heappush(self._slowest, (int(match.group(1)) / 1000, str(path)))
+        self._prune()
+
+    def _prune(self):
+        """En yavaş `keep` profilin dışında kalan dosyaları siler"""
+        while len(self._slowest) > self.keep:
+            _, evicted_path = heapq.heappop(self._slowest)
+            try:
+                os.remove(evicted_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _collapse(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def _sample(self, thread_id, samples, stop_event):
+        while not stop_event.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                samples[self._collapse(frame)] += 1
+
+    @contextmanager
+    def profile(self, name):
+        samples = Counter()
+        stop_event = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample,
+            args=(threading.get_ident(), samples, stop_event),
+            name=f'profiler-{name}',
+            daemon=True
+        )
+
+        start_time = time.perf_counter()
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop_event.set()
+            sampler.join()
+            self._keep_if_slow(name, time.perf_counter() - start_time, samples)
+
+    def _keep_if_slow(self, name, duration, samples):
+        if not samples:
+            return
+
+        with self._lock:
+            if len(self._slowest) >= self.keep and duration <= self._slowest[0][0]:
+                return
+
+            timestamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            path = self.folder / f"{name}-{timestamp}-{int(duration * 1000)}ms.folded"
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in samples.most_common():
+                    f.write(f"{stack} {count}\n")
+
+            heapq.heappush(self._slowest, (duration, str(path)))
+            self._prune()
@@ -0,0 +1,81 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+NEAR_PATTERN = re.compile(r'(?u)(\w+)\s+NEAR/(\d+)\s+(\w+)')
+NEAR_OPERATOR = re.compile(r'\bNEAR/\d+\b')
+
+TURKISH_STOPWORDS = frozenset([
+    'acaba', 'ama', 'ancak', 'artık', 'aslında', 'az', 'bana', 'bazen', 'bazı',
+    'belki', 'ben', 'beni', 'benim', 'bile', 'bir', 'biri', 'birkaç', 'birşey',
+    'biz', 'bize', 'bizi', 'bizim', 'bu', 'buna', 'bunda', 'bundan', 'bunlar',
+    'bunları', 'bunların', 'bunu', 'bunun', 'burada', 'çok', 'çünkü', 'da',
+    'daha', 'dahi', 'de', 'defa', 'diye', 'diğer', 'en', 'gibi', 'hem', 'hep',
+    'hepsi', 'her', 'hiç', 'için', 'ile', 'ise', 'işte', 'kadar', 'ki', 'kim',
+    'kimse', 'mi', 'mı', 'mu', 'mü', 'nasıl', 'ne', 'neden', 'nerede', 'nereye',
+    'niçin', 'niye', 'ona', 'ondan', 'onlar', 'onlardan', 'onları', 'onların',
+    'onu', 'onun', 'orada', 'sanki', 'siz', 'size', 'sizi', 'sizin', 'şey', 'şu',
+    'şuna', 'şunda', 'şundan', 'şunu', 'tüm', 'üzere', 've', 'veya', 'ya',
+    'yani', 'yine', 'yoksa'
+])
+
+
+def turkish_lower(text):
+    """Türkçe'ye uygun küçük harf dönüşümü (İ -> i, I -> ı)"""
+    return text.replace('İ', 'i').replace('I', 'ı').lower()
+
+
+def tokenize(text):
+    """Metni vectorizer ile aynı kurallarla terimlere ayırır (stopword'ler korunur)"""
+    return TOKEN_PATTERN.findall(turkish_lower(text))
+
+
+@dataclass
+class AnalyzedQuery:
+    original: str
+    terms: List[str] = field(default_factory=list)
+    phrases: List[List[str]] = field(default_factory=list)
+    proximity: List[Tuple[str, str, int]] = field(default_factory=list)
+
+    @property
+    def normalized(self):
+        return ' '.join(self.terms)
+
+    def is_empty(self):
+        return not self.terms
+
+    def is_structured(self):
+        """Sorgu tırnaklı ifade veya NEAR/k içeriyor mu"""
+        return bool(self.phrases or self.proximity)
+
+
+class QueryAnalyzer:
+
+    def __init__(self, stopwords=TURKISH_STOPWORDS):
+        self.stopwords = stopwords
+
+    def analyze(self, query):
+        """
+        Desteklenen sözdizimi:
+            "tam ifade"      -> kelimeler bu sırayla ve yan yana geçmeli
+            kelime NEAR/k x  -> iki kelime arasında en fazla k kelime bulunmalı (NEAR/0: yan yana)
+
+        Args:
+            query: Kullanıcı sorgusu
+
+        Returns:
+            AnalyzedQuery: Küçük harfe çevrilmiş, stopword'lerden arındırılmış terimler
+        """
+        phrases = [tokens for tokens in map(tokenize, PHRASE_PATTERN.findall(query)) if tokens]
+
+        unquoted = query.replace('"', ' ')
+        proximity = [
+            (turkish_lower(left), turkish_lower(right), int(distance))
+            for left, distance, right in NEAR_PATTERN.findall(unquoted)
+        ]
+
+        tokens = tokenize(NEAR_OPERATOR.sub(' ', unquoted))
+        terms = [token for token in tokens if token not in self.stopwords]
+        return AnalyzedQuery(original=query, terms=terms, phrases=phrases, proximity=proximity)
@@ -0,0 +1,175 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .utils import setup_logger
+
+try:
+    from sentence_transformers import CrossEncoder
+except ImportError:
+    CrossEncoder = None
+
+logger = setup_logger(__name__)
+
+
+class Reranker:
+    """
+    İlk aşamada TF-IDF ile bulunan adayları yerel bir cross-encoder ile
+    yeniden sıralar. Çıkarım thread havuzunda batch'ler halinde yapılır;
+    süre bütçesi aşılırsa ilk aşama sırası korunur.
+    """
+
+    def __init__(self, model_name, batch_size=16, timeout=1.0, workers=2, cache_size=10000, scorer=None,
+                 max_pending_batches=None):
+        """
+        Args:
+            model_name: sentence-transformers CrossEncoder model adı
+            batch_size: Bir çıkarım çağrısındaki (sorgu, chunk) çifti sayısı
+            timeout: Yeniden sıralama için saniye cinsinden süre bütçesi
+            workers: Çıkarım thread sayısı
+            cache_size: Önbellekte tutulacak (sorgu, chunk) skoru sayısı
+            scorer: [(sorgu, metin), ...] -> skorlar; verilmezse model kullanılır
+            max_pending_batches: Kuyrukta/işlemde olabilecek en fazla batch; aşılırsa
+                yeniden sıralama atlanır (varsayılan: workers * 4)
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.max_pending_batches = max_pending_batches or workers * 4
+        self._scorer = scorer
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._warm_up_started = False
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reranker')
+
+    @staticmethod
+    def is_supported():
+        return CrossEncoder is not None
+
+    def _load_model(self):
+        with self._model_lock:
+            if self._model is None:
+                logger.info(f"Re-ranker modeli yükleniyor: {self.model_name}")
+                model = CrossEncoder(self.model_name, device='cpu')
+                # İlk çıkarımdaki tek seferlik başlatma maliyeti de burada ödenir
+                model.predict([('ısınma', 'ısınma')], show_progress_bar=False)
+                self._model = model
+                logger.info("Re-ranker modeli hazır")
+
+    def warm_up(self):
+        """Modeli arka planda yükler; model hazır olana kadar rerank ilk aşama sırasını döndürür"""
+        with self._model_lock:
+            if self._scorer is not None or self._warm_up_started:
+                return
+            self._warm_up_started = True
+        self._executor.submit(self._load_model).add_done_callback(self._log_warm_up_error)
+
+    @staticmethod
+    def _log_warm_up_error(future):
+        if future.exception() is not None:
+            logger.error(f"Re-ranker modeli yüklenemedi: {future.exception()}")
+
+    def is_ready(self):
+        return self._scorer is not None or self._model is not None
+
+    def _score_pairs(self, pairs):
+        if self._scorer is not None:
+            return self._scorer(pairs)
+        return self._model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+
+    def _batch_finished(self, future):
+        with self._pending_lock:
+            self._pending -= 1
+
+    def _score_batch(self, query, keys, texts):
+        scores = self._score_pairs([(query, text) for text in texts])
+
+        # Süre aşımından sonra biten batch'ler de önbelleğe yazılır
+        with self._cache_lock:
+            for key, score in zip(keys, scores):
+                self._cache[key] = float(score)
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cached_scores(self, keys):
+        with self._cache_lock:
+            found = {}
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+            return found
+
+    def rerank(self, query, results):
+        """
+        Args:
+            query: Kullanıcı sorgusu
+            results: İlk aşama SearchResult listesi
+
+        Returns:
+            list: Yeniden sıralanmış sonuçlar; süre aşımında ilk aşama sırası
+        """
+        if not results:
+            return results
+
+        if not self.is_ready():
+            # Model isteğin süre bütçesi içinde yüklenmez; yükleme arka planda başlatılır
+            self.warm_up()
+            return results
+
+        # Aynı adla yeniden yüklenen dökümanlar için metin özeti de anahtara katılır
+        keys = [(query, result.document, result.chunk_id, hash(result.chunk_text)) for result in results]
+        cached = self._cached_scores(keys)
+        missing = [(key, result) for key, result in zip(keys, results) if key not in cached]
+
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+
+        # Kuyruk sınırlı: çıkarım yetişemiyorsa yeni iş eklenmez, ilk aşama sırası döner
+        with self._pending_lock:
+            if self._pending + len(batches) > self.max_pending_batches:
+                logger.warning(f"Re-ranker kuyruğu dolu ({self._pending} batch), yeniden sıralama atlandı")
+                return results
+            self._pending += len(batches)
+
+        futures = []
+        for batch in batches:
+            future = self._executor.submit(
+                self._score_batch,
+                query,
+                [key for key, _ in batch],
+                [result.chunk_text for _, result in batch]
+            )
+            future.add_done_callback(self._batch_finished)
+            futures.append(future)
+
+        if futures:
+            done, not_done = wait(futures, timeout=self.timeout)
+            if not_done:
+                # Henüz başlamamış batch'ler iptal edilir; çalışanlar bitince önbelleğe yazar
+                for future in not_done:
+                    future.cancel()
+                logger.warning(f"Re-rank süre bütçesi aşıldı ({self.timeout}s), ilk aşama sırası kullanılıyor")
+                return results
+
+            for future in done:
+                if future.exception() is not None:
+                    logger.error(f"Re-rank hatası: {future.exception()}")
+                    return results
+
+        scores = self._cached_scores(keys)
+        if len(scores) < len(set(keys)):
+            return results
+
+        for key, result in zip(keys, results):
+            result.rerank_score = scores[key]
+
+        return sorted(results, key=lambda result: result.rerank_score, reverse=True)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,23 +1,103 @@
+import math
 import time
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from collections import Counter
+from itertools import chain
+from typing import List, Optional
 import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
 
 from .models import SearchResult, SearchResponse, ProcessedDocument
+from .filters import ChunkAttributes, SearchFilter
+from .statistics import TermStatistics
+from .positional_index import PositionalIndex
+from .profiling import StageTimer
+from .query_analyzer import QueryAnalyzer, TURKISH_STOPWORDS, turkish_lower
 from .utils import SearchError, setup_logger
 
 logger = setup_logger(__name__)
 
+
+def select_top_k(scores, k):
+    """Skor dizisindeki en yüksek k elemanın indekslerini azalan sırada döndürür"""
+    if k <= 0 or scores.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    
+    if k < scores.size:
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(scores.size)
+    
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def rescore_with_shared_idf(engines, query, results):
+    """
+    Farklı dökümanlardan gelen sonuçları ortak bir IDF ile yeniden skorlar.
+    
+    Her döküman kendi vectorizer'ını eğittiği için ham cosine skorları
+    birbiriyle karşılaştırılamaz. Dökümanların doküman frekansları toplanarak
+    IDF tüm dökümanlar tek bir korpusmuş gibi hesaplanır; chunk ve sorgu
+    vektörleri bu IDF ile yeniden ağırlıklandırılıp cosine benzerliği alınır.
+    Dökümanlara özgü max_df / max_features budaması nedeniyle sonuç, tek bir
+    ortak indeksin skoruna yakınsaktır.
+    """
+    if len(engines) < 2 or not results:
+        return results
+    
+    by_document = {engine.current_document.filename: engine for engine in engines}
+    total_chunks = sum(engine.current_document.get_chunk_count() for engine in engines)
+    idf_cache = {}
+    
+    def shared_idf(term):
+        if term not in idf_cache:
+            document_frequency = 0
+            for engine in engines:
+                index = engine.vectorizer.vocabulary_.get(term)
+                if index is not None:
+                    document_frequency += int(engine.current_document.term_statistics.document_frequency[index])
+            # TfidfVectorizer(smooth_idf=True) formülü; hiçbir sözlükte olmayan terim skora katılmaz
+            idf_cache[term] = math.log((1 + total_chunks) / (1 + document_frequency)) + 1 if document_frequency else 0.0
+        return idf_cache[term]
+    
+    normalized_query = engines[0].query_analyzer.analyze(query).normalized
+    query_counts = Counter(engines[0]._ngram_analyzer(normalized_query))
+    query_weights = {term: count * shared_idf(term) for term, count in query_counts.items()}
+    query_norm = math.sqrt(sum(weight * weight for weight in query_weights.values()))
+    if not query_norm:
+        return results
+    
+    for result in results:
+        engine = by_document[result.document]
+        row = engine.current_document.tfidf_matrix[result.chunk_id]
+        feature_names = engine.get_feature_names()
+        local_idf = engine.vectorizer.idf_
+        
+        # Satır ağırlığı tf * idf_yerel / norm; yerel IDF'e bölünüp ortak IDF ile çarpılır (norm kısalır)
+        weights = {
+            feature_names[index]: weight / local_idf[index] * shared_idf(feature_names[index])
+            for index, weight in zip(row.indices, row.data)
+        }
+        row_norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        dot = sum(query_weights.get(term, 0.0) * weight for term, weight in weights.items())
+        result.similarity_score = dot / (query_norm * row_norm) if row_norm else 0.0
+    
+    return results
+
+
 class SearchEngine:
     
     def __init__(self, max_features=5000):
         self.max_features = max_features
         self.vectorizer = None
         self.current_document = None
+        self.query_analyzer = QueryAnalyzer()
+        self._ngram_analyzer = None
+        self._feature_names = None
         logger.info("Search Engine başlatıldı")
     
-    def index_document(self, document: ProcessedDocument):
-        
+    def index_document(self, document: ProcessedDocument, chunk_texts: Optional[List[str]] = None):
+        """chunk_texts verilirse metin deposu indeksleme için yeniden açılmaz"""
         try:
             logger.info(f"Döküman indeksleniyor: {document.filename}")
             
@@ -25,24 +105,27 @@ class SearchEngine:
                 raise SearchError("Döküman chunk'ı yok")
             
             
-            chunk_texts = [chunk.text for chunk in document.chunks]
+            if chunk_texts is None:
+                chunk_texts = document.get_chunk_texts()
             
             
-            self.vectorizer = TfidfVectorizer(
-                max_features=self.max_features,
-                ngram_range=(1, 2),
-                min_df=1,
-                max_df=0.95,
-                lowercase=True
-            )
-            
+            # Metin bir kez tokenize edilir; TF-IDF ve terim istatistikleri aynı sayım matrisinden türetilir
+            count_vectorizer = CountVectorizer(max_features=self.max_features, **self._analyzer_params())
+            count_matrix = count_vectorizer.fit_transform(chunk_texts)
+            transformer = TfidfTransformer()
+            tfidf_matrix = transformer.fit_transform(count_matrix)
             
-            tfidf_matrix = self.vectorizer.fit_transform(chunk_texts)
+            # Sorgu zamanı için aynı sözlük ve IDF ile TfidfVectorizer kurulur (yeniden eğitilmez)
+            self.vectorizer = TfidfVectorizer(vocabulary=count_vectorizer.vocabulary_, **self._analyzer_params())
+            self.vectorizer.idf_ = transformer.idf_
             
             
             document.vectorizer = self.vectorizer
             document.tfidf_matrix = tfidf_matrix
-            self.current_document = document
+            document.term_statistics = TermStatistics.build(self.vectorizer, tfidf_matrix, count_matrix)
+            document.positional_index = PositionalIndex.build(chunk_texts)
+            document.chunk_attributes = ChunkAttributes.from_chunks(document.chunks)
+            self._activate(document)
             
             logger.info(f"Döküman başarıyla indekslendi: {len(chunk_texts)} chunk")
             return True
@@ -52,9 +135,118 @@ class SearchEngine:
             logger.error(error_msg)
             raise SearchError(error_msg)
     
-    def search(self, query: str, max_results: int = 5, min_similarity: float = 0.01) -> SearchResponse:
+    @staticmethod
+    def _analyzer_params():
+        return {
+            'ngram_range': (1, 2),
+            'min_df': 1,
+            'max_df': 0.95,
+            'lowercase': True,
+            'preprocessor': turkish_lower,
+            'stop_words': sorted(TURKISH_STOPWORDS)
+        }
+    
+    def has_valid_index(self, document: ProcessedDocument) -> bool:
+        """Kalıcı vectorizer ve matris yeniden eğitilmeden kullanılabilir mi"""
+        vectorizer = document.vectorizer
+        tfidf_matrix = document.tfidf_matrix
+        
+        if vectorizer is None or tfidf_matrix is None or not hasattr(vectorizer, 'vocabulary_'):
+            return False
+        
+        if tfidf_matrix.shape[0] != len(document.chunks):
+            return False
+        
+        # Eski indeksler Türkçe küçük harf dönüşümü olmadan eğitilmiş
+        return getattr(vectorizer, 'preprocessor', None) is turkish_lower
+    
+    def attach_document(self, document: ProcessedDocument):
+        """
+        Diskten yüklenen dökümanı kalıcı vectorizer ve TF-IDF matrisiyle aramaya
+        hazırlar. İndeks geçersizse döküman yeniden indekslenir.
+        """
+        if not self.has_valid_index(document):
+            logger.warning(f"Kalıcı indeks geçersiz, yeniden indeksleniyor: {document.filename}")
+            return self.index_document(document)
+        
+        try:
+            if document.term_statistics is None:
+                count_vectorizer = CountVectorizer(vocabulary=document.vectorizer.vocabulary_, **self._analyzer_params())
+                document.term_statistics = TermStatistics.build(
+                    document.vectorizer, document.tfidf_matrix, count_vectorizer.transform(document.get_chunk_texts())
+                )
+            self._activate(document)
+            
+            logger.info(f"Kalıcı indeks yüklendi: {document.filename}")
+            return True
+            
+        except Exception as e:
+            error_msg = f"İndeks yükleme hatası: {str(e)}"
+            logger.error(error_msg)
+            raise SearchError(error_msg)
+    
+    def _activate(self, document: ProcessedDocument):
+        """İndekslenmiş dökümanı aramaya hazır hale getirir"""
+        if document.positional_index is None:
+            document.positional_index = PositionalIndex.build(document.get_chunk_texts())
+        if document.chunk_attributes is None:
+            document.chunk_attributes = ChunkAttributes.from_chunks(document.chunks)
+        
+        self.vectorizer = document.vectorizer
+        self._ngram_analyzer = self.vectorizer.build_analyzer()
+        self._feature_names = None
+        self.current_document = document
+    
+    def get_feature_names(self):
+        """Sütun indeksi -> terim dizisi (ilk ihtiyaçta oluşturulur)"""
+        if self._feature_names is None:
+            self._feature_names = self.vectorizer.get_feature_names_out()
+        return self._feature_names
+    
+    def _has_known_terms(self, normalized_query: str) -> bool:
+        """Sorgudan üretilen n-gram'lardan en az biri sözlükte mi"""
+        vocabulary = self.vectorizer.vocabulary_
+        return any(ngram in vocabulary for ngram in self._ngram_analyzer(normalized_query))
+    
+    def _structured_candidates(self, analyzed) -> np.ndarray:
+        """Tırnaklı ifade ve NEAR/k koşullarının hepsini sağlayan chunk indeksleri"""
+        index = self.current_document.positional_index
+        clause_matches = chain(
+            (index.match_phrase(terms) for terms in analyzed.phrases),
+            (index.match_near(*clause) for clause in analyzed.proximity)
+        )
+        
+        candidates = None
+        for matches in clause_matches:
+            candidates = matches if candidates is None else np.intersect1d(candidates, matches, assume_unique=True)
+            if not candidates.size:
+                break
+        
+        return candidates
+    
+    def _top_k(self, query_vector, k: int, candidates=None) -> list:
+        """
+        Sorgu vektörüne en benzer k chunk'ı (indeks, skor) olarak döndürür.
+        candidates verilirse yalnızca bu satırlar skorlanır.
+        """
+        tfidf_matrix = self.current_document.tfidf_matrix
+        if candidates is not None:
+            tfidf_matrix = tfidf_matrix[candidates]
+        
+        similarities = cosine_similarity(query_vector, tfidf_matrix).flatten()
+        top_indices = select_top_k(similarities, k)
+        rows = top_indices if candidates is None else candidates[top_indices]
+        return [(int(row), float(similarities[idx])) for row, idx in zip(rows, top_indices)]
+    
+    def close(self):
+        """Motorun tuttuğu kaynakları serbest bırakır"""
+        pass
+    
+    def search(self, query: str, max_results: int = 5, min_similarity: float = 0.01,
+               search_filter: SearchFilter = None) -> SearchResponse:
 
         start_time = time.time()
+        timer = StageTimer()
         
         try:
             if not self.current_document or not self.vectorizer:
@@ -63,34 +255,70 @@ class SearchEngine:
             logger.info(f"Arama yapılıyor: '{query}'")
             
             
-            query_vector = self.vectorizer.transform([query])
+            analyzed = self.query_analyzer.analyze(query)
+            timer.lap('analyze')
             
+            # Filtreler skorlamadan önce uygulanır; yalnızca kalan satırlar taranır
+            candidates = None
+            if search_filter is not None:
+                if not search_filter.matches_document(self.current_document):
+                    return self._empty_response(query, start_time, timer, "Döküman filtreye uymuyor")
+                
+                mask = search_filter.chunk_mask(self.current_document.chunk_attributes)
+                if mask is not None:
+                    candidates = np.flatnonzero(mask)
+                    if not candidates.size:
+                        return self._empty_response(query, start_time, timer, "Filtreye uyan chunk yok")
+            timer.lap('filter')
+            
+            if analyzed.is_structured():
+                matches = self._structured_candidates(analyzed)
+                if candidates is not None:
+                    matches = np.intersect1d(candidates, matches, assume_unique=True)
+                candidates = matches
+                if not candidates.size:
+                    return self._empty_response(query, start_time, timer, "İfade/yakınlık eşleşmesi yok")
+                
+                # Tam eşleşen chunk'lar benzerlik eşiğine takılmaz
+                min_similarity = 0.0
+                timer.lap('phrase')
             
-            similarities = cosine_similarity(query_vector, self.current_document.tfidf_matrix).flatten()
+            has_known_terms = not analyzed.is_empty() and self._has_known_terms(analyzed.normalized)
+            timer.lap('vocabulary')
+            if not has_known_terms and not analyzed.is_structured():
+                return self._empty_response(query, start_time, timer, "Sorgu terimleri sözlükte yok")
             
             
-            top_indices = similarities.argsort()[-max_results:][::-1]
+            if has_known_terms:
+                query_vector = self.vectorizer.transform([analyzed.normalized])
+                timer.lap('vectorize')
+                top_matches = self._top_k(query_vector, max_results, candidates)
+            else:
+                top_matches = [(int(idx), 0.0) for idx in candidates[:max_results]]
+            timer.lap('score')
             
             
             results = []
-            for idx in top_indices:
-                similarity_score = similarities[idx]
-                
+            for idx, similarity_score in top_matches:
                 if similarity_score >= min_similarity:
                     chunk = self.current_document.chunks[idx]
                     result = SearchResult(
                         chunk_id=chunk.id,
-                        chunk_text=chunk.text,
-                        similarity_score=similarity_score
+                        chunk_text=self.current_document.get_chunk_text(chunk),
+                        similarity_score=similarity_score,
+                        document=self.current_document.filename,
+                        page_number=chunk.page_number
                     )
                     results.append(result)
             
             
+            timer.lap('results')
             search_time = time.time() - start_time
             response = SearchResponse(
                 query=query,
                 results=results,
-                search_time=search_time
+                search_time=search_time,
+                stage_timings=timer.timings
             )
             
             logger.info(f"Arama tamamlandı: {len(results)} sonuç bulundu, {search_time:.3f}s")
@@ -101,6 +329,11 @@ class SearchEngine:
             logger.error(error_msg)
             raise SearchError(error_msg)
     
+    def _empty_response(self, query: str, start_time: float, timer: StageTimer, reason: str) -> SearchResponse:
+        search_time = time.time() - start_time
+        logger.info(f"{reason}, tarama atlandı: {search_time:.3f}s")
+        return SearchResponse(query=query, results=[], search_time=search_time, stage_timings=timer.timings)
+    
     def get_similar_chunks(self, chunk_id: int, max_results: int = 3) -> list:
         try:
             if not self.current_document or chunk_id >= len(self.current_document.chunks):
@@ -122,7 +355,7 @@ class SearchEngine:
                     chunk = self.current_document.chunks[idx]
                     similar_chunks.append({
                         'chunk_id': chunk.id,
-                        'text': chunk.text,
+                        'text': self.current_document.get_chunk_text(chunk),
                         'similarity': similarities[idx]
                     })
             
@@ -132,42 +365,36 @@ class SearchEngine:
             logger.error(f"Benzer chunk bulma hatası: {e}")
             return []
     
+    def get_index_version(self) -> str:
+        """İndeks her yeniden oluşturulduğunda değişen sürüm bilgisi"""
+        if not self.current_document:
+            return ''
+        document = self.current_document
+        return f"{document.filename}:{document.processed_at.isoformat()}:{document.get_chunk_count()}"
+    
+    def get_memory_usage(self) -> int:
+        """Motorun tuttuğu dökümanın yaklaşık bellek kullanımı (byte)"""
+        if not self.current_document:
+            return 0
+        return self.current_document.estimate_memory_bytes()
+    
     def get_search_statistics(self) -> dict:
         """Arama istatistiklerini döndürür"""
         if not self.current_document:
             return {}
         
+        stats = self.current_document.term_statistics
         return {
             'indexed_document': self.current_document.filename,
             'total_chunks': len(self.current_document.chunks),
             'total_words': self.current_document.get_total_words(),
-            'vectorizer_features': len(self.vectorizer.get_feature_names_out()) if self.vectorizer else 0,
+            'vectorizer_features': stats.vocabulary_size if stats else 0,
+            'index_memory_bytes': stats.index_memory_bytes if stats else 0,
             'indexed_at': self.current_document.processed_at.strftime('%Y-%m-%d %H:%M:%S')
         }
     
     def get_top_terms(self, n: int = 10) -> list:
-        try:
-            if not self.vectorizer or not self.current_document:
-                return []
-            
-            
-            feature_names = self.vectorizer.get_feature_names_out()
-            
-            
-            mean_scores = np.mean(self.current_document.tfidf_matrix.toarray(), axis=0)
-            
-            
-            top_indices = mean_scores.argsort()[-n:][::-1]
-            
-            top_terms = []
-            for idx in top_indices:
-                top_terms.append({
-                    'term': feature_names[idx],
-                    'score': round(mean_scores[idx], 4)
-                })
-            
-            return top_terms
-            
-        except Exception as e:
-            logger.error(f"Top terimler alınamadı: {e}")
+        if not self.current_document or not self.current_document.term_statistics:
             return []
+        
+        return self.current_document.term_statistics.get_top_terms(n, self.get_feature_names())
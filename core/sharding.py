@@ -0,0 +1,191 @@
+import heapq
+import multiprocessing
+import queue
+import threading
+from multiprocessing.connection import wait as wait_connections
+
+import numpy as np
+
+from .search_engine import SearchEngine, select_top_k
+from .models import ProcessedDocument
+from .utils import SearchError, setup_logger
+
+logger = setup_logger(__name__)
+
+
+def shard_worker(conns, shard_matrix, row_offset):
+    """
+    Tek bir shard'ı servis eden işçi döngüsü.
+
+    Koordinatördeki her istek yuvası (slot) için ayrı bir multiprocessing
+    Connection dinler; farklı yuvalardaki sorgular sırayla işlenir, böylece bir
+    sorgu diğer shard'ları beklerken bu shard bir sonrakine geçebilir. Aynı döngü
+    multiprocessing.connection.Listener/Client ile başka bir makinede de çalışabilir.
+
+    Mesajlar:
+        (query_vector, k, candidates) -> [(skor, global_chunk_indeksi), ...]
+        None              -> yuvayı kapatır; tüm yuvalar kapanınca işçi biter
+    """
+    shard_matrix = shard_matrix.tocsr()
+    row_end = row_offset + shard_matrix.shape[0]
+    open_conns = list(conns)
+    try:
+        while open_conns:
+            for conn in wait_connections(open_conns):
+                try:
+                    message = conn.recv()
+                except EOFError:
+                    message = None
+                if message is None:
+                    conn.close()
+                    open_conns.remove(conn)
+                    continue
+
+                query_vector, k, candidates = message
+                if candidates is None:
+                    rows = np.arange(shard_matrix.shape[0])
+                    matrix = shard_matrix
+                else:
+                    in_shard = candidates[(candidates >= row_offset) & (candidates < row_end)]
+                    rows = in_shard - row_offset
+                    matrix = shard_matrix[rows]
+
+                if not rows.size:
+                    conn.send([])
+                    continue
+
+                # Satırlar ve sorgu L2 normalize: nokta çarpım = cosine benzerliği
+                scores = np.asarray((matrix @ query_vector.T).todense()).ravel()
+                top_indices = select_top_k(scores, k)
+                conn.send([(float(scores[idx]), row_offset + int(rows[idx])) for idx in top_indices])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for conn in open_conns:
+            conn.close()
+
+
+def shard_context():
+    """
+    Shard süreçleri için başlatma bağlamı. Motorlar Flask istek thread'lerinden ve
+    ön yükleme havuzundan oluşturulur; çok thread'li bir süreci fork etmek, başka
+    bir thread'in tuttuğu kilitlerle (ör. logging) çocuğu kilitleyebilir. forkserver
+    tek thread'li bir sunucudan fork eder, yoksa spawn kullanılır.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # Sunucu bu modülü (numpy/scipy/sklearn dahil) bir kez yükler; shard'lar hazır başlar
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+class ShardedSearchEngine(SearchEngine):
+    """
+    TF-IDF matrisini satır bazında N shard'a bölüp her shard'ı ayrı bir işlemde
+    tarayan koordinatör. IDF istatistikleri koordinatördeki tek vectorizer'dan
+    gelir, bu yüzden shard skorları global olarak tutarlıdır.
+
+    Sharding döküman başınadır: bellekteki her döküman kendi num_shards sürecini
+    başlatır ve her süreç bellek bütçesinden SHARD_PROCESS_OVERHEAD düşer (1 GB
+    bütçe ve 4 shard ile yaklaşık 3 döküman). Bu yüzden az sayıda büyük döküman
+    için uygundur. Bir döküman aynı anda en fazla `slots` sorgu taşır; fazlası
+    boş yuva bekler.
+    """
+
+    # Bir shard sürecinin matris dışındaki yaklaşık özel belleği (yorumlayıcı + numpy/scipy/sklearn)
+    SHARD_PROCESS_OVERHEAD = 64 * 1024 * 1024
+
+    def __init__(self, num_shards=2, max_features=5000, slots=4):
+        super().__init__(max_features=max_features)
+        self.num_shards = num_shards
+        self.slots = max(1, slots)
+        self._shards = []
+        self._free_slots = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _activate(self, document: ProcessedDocument):
+        super()._activate(document)
+        self._start_shards(document.tfidf_matrix)
+
+    def _start_shards(self, tfidf_matrix):
+        self.close()
+
+        matrix = tfidf_matrix.tocsr()
+        n_rows = matrix.shape[0]
+        shard_count = max(1, min(self.num_shards, n_rows))
+        bounds = np.linspace(0, n_rows, shard_count + 1).astype(int)
+
+        context = shard_context()
+        shards = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            pipes = [context.Pipe() for _ in range(self.slots)]
+            process = context.Process(
+                target=shard_worker,
+                args=([child_conn for _, child_conn in pipes], matrix[start:end], int(start)),
+                daemon=True
+            )
+            process.start()
+            for _, child_conn in pipes:
+                child_conn.close()
+            shards.append((process, [parent_conn for parent_conn, _ in pipes]))
+
+        free_slots = queue.Queue()
+        for slot in range(self.slots):
+            free_slots.put(slot)
+
+        with self._lock:
+            self._shards = shards
+            self._free_slots = free_slots
+
+        logger.info(f"{shard_count} shard başlatıldı ({n_rows} chunk, {self.slots} yuva)")
+
+    def get_memory_usage(self) -> int:
+        """Koordinatördeki döküman + shard süreçlerindeki matris kopyası ve süreç başına yük"""
+        size = super().get_memory_usage()
+        if self._shards and self.current_document is not None:
+            matrix = self.current_document.tfidf_matrix
+            size += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+            size += len(self._shards) * self.SHARD_PROCESS_OVERHEAD
+        return size
+
+    def _top_k(self, query_vector, k: int, candidates=None) -> list:
+        with self._lock:
+            shards, free_slots = self._shards, self._free_slots
+        if not shards:
+            raise SearchError("Shard'lar başlatılmamış")
+
+        # Her yuvanın shard başına kendi bağlantısı var; farklı yuvalardaki sorgular birbirini kilitlemez
+        slot = free_slots.get()
+        try:
+            # Scatter: sorgu tüm shard'lara gönderilir, ardından cevaplar toplanır
+            for _, conns in shards:
+                conns[slot].send((query_vector, k, candidates))
+            partials = [conns[slot].recv() for _, conns in shards]
+        finally:
+            free_slots.put(slot)
+
+        # Gather: shard başına top-k listeleri heap ile birleştirilir
+        merged = heapq.nlargest(
+            k,
+            (hit for partial in partials for hit in partial),
+            key=lambda hit: (hit[0], -hit[1])
+        )
+        return [(idx, score) for score, idx in merged]
+
+    def close(self):
+        with self._lock:
+            shards, self._shards = self._shards, []
+
+        for process, conns in shards:
+            for conn in conns:
+                try:
+                    conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                conn.close()
+
+        for process, _ in shards:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
@@ -0,0 +1,75 @@
+import numpy as np
+
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class TermStatistics:
+    """İndeksleme sırasında bir kez hesaplanan terim istatistikleri"""
+
+    def __init__(self, top_terms_limit=100):
+        self.top_terms_limit = top_terms_limit
+        self.vocabulary_size = 0
+        self.chunk_count = 0
+        self.mean_weights = np.zeros(0, dtype=np.float64)
+        self.document_frequency = np.zeros(0, dtype=np.int32)
+        self.collection_frequency = np.zeros(0, dtype=np.int64)
+        self.top_terms = []
+        self.index_memory_bytes = 0
+
+    @classmethod
+    def build(cls, vectorizer, tfidf_matrix, count_matrix=None, top_terms_limit=100):
+        """
+        Args:
+            vectorizer: Eğitilmiş TfidfVectorizer
+            tfidf_matrix: Chunk x terim seyrek matrisi (CSR)
+            count_matrix: İndekslemedeki ham terim sayıları; verilirse collection frequency hesaplanır
+
+        Returns:
+            TermStatistics
+        """
+        stats = cls(top_terms_limit=top_terms_limit)
+
+        matrix = tfidf_matrix.tocsr()
+        n_chunks, n_features = matrix.shape
+        stats.chunk_count = n_chunks
+        stats.vocabulary_size = n_features
+
+        # Seyrek matris üzerinden sütun ortalaması; yoğun diziye çevrilmez
+        column_sums = np.asarray(matrix.sum(axis=0)).ravel()
+        stats.mean_weights = column_sums / n_chunks if n_chunks else column_sums
+        stats.document_frequency = np.bincount(matrix.indices, minlength=n_features).astype(np.int32)
+
+        if count_matrix is not None:
+            stats.collection_frequency = np.asarray(count_matrix.sum(axis=0)).ravel().astype(np.int64)
+        else:
+            stats.collection_frequency = np.zeros(n_features, dtype=np.int64)
+
+        stats.top_terms = stats._rank_terms(vectorizer.get_feature_names_out(), top_terms_limit)
+
+        stats.index_memory_bytes = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes + stats.nbytes()
+
+        logger.info(f"Terim istatistikleri hesaplandı: {n_features} terim, {n_chunks} chunk")
+        return stats
+
+    def nbytes(self):
+        return self.mean_weights.nbytes + self.document_frequency.nbytes + self.collection_frequency.nbytes
+
+    def _rank_terms(self, feature_names, n):
+        top_indices = np.argsort(-self.mean_weights, kind='stable')[:n]
+        return [
+            {
+                'term': str(feature_names[idx]),
+                'score': round(float(self.mean_weights[idx]), 4),
+                'document_frequency': int(self.document_frequency[idx]),
+                'collection_frequency': int(self.collection_frequency[idx])
+            }
+            for idx in top_indices
+        ]
+
+    def get_top_terms(self, n, feature_names):
+        """İlk top_terms_limit terim hazır listeden, daha fazlası istenirse ağırlıklardan sıralanır"""
+        if n <= len(self.top_terms) or len(self.top_terms) >= self.vocabulary_size:
+            return self.top_terms[:n]
+        return self._rank_terms(feature_names, n)
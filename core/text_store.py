@@ -0,0 +1,68 @@
+import threading
+import zlib
+from collections import OrderedDict
+
+
+class CompressedTextStore:
+    """
+    Temizlenmiş döküman metnini bağımsız açılabilen zlib bloklarında saklar.
+    Chunk'lar metne (offset, length) aralığı olarak referans verir; bir aralığı
+    okumak yalnızca kapsadığı blokların açılmasını gerektirir.
+    """
+
+    def __init__(self, text, block_size=65536, level=6, cache_blocks=8):
+        self.block_size = block_size
+        self.length = len(text)
+        self.cache_blocks = cache_blocks
+        self.blocks = [
+            zlib.compress(text[start:start + block_size].encode('utf-8'), level)
+            for start in range(0, len(text), block_size)
+        ]
+        self._init_cache()
+
+    def _init_cache(self):
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_cache']
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_cache()
+
+    def _block(self, block_idx):
+        with self._lock:
+            if block_idx in self._cache:
+                self._cache.move_to_end(block_idx)
+                return self._cache[block_idx]
+
+        block = zlib.decompress(self.blocks[block_idx]).decode('utf-8')
+
+        with self._lock:
+            self._cache[block_idx] = block
+            while len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+        return block
+
+    def get(self, offset, length):
+        """Metnin [offset, offset + length) aralığını döndürür"""
+        if length <= 0:
+            return ""
+
+        first = offset // self.block_size
+        last = (min(offset + length, self.length) - 1) // self.block_size
+        text = ''.join(self._block(block_idx) for block_idx in range(first, last + 1))
+
+        start = offset - first * self.block_size
+        return text[start:start + length]
+
+    def get_text(self):
+        """Tüm metni tek seferde açar (indeksleme için)"""
+        return ''.join(zlib.decompress(block).decode('utf-8') for block in self.blocks)
+
+    def nbytes(self):
+        return sum(len(block) for block in self.blocks)
@@ -52,6 +52,47 @@ class Validator:
                 raise ValidationError("Geçersiz karakter içeriği")
         
         return query
+    
+    @staticmethod
+    def validate_documents(documents, max_count=20):
+        """Arama yapılacak döküman adları listesini doğrular"""
+        if not isinstance(documents, list) or not documents:
+            raise ValidationError("Döküman listesi boş olmayan bir liste olmalı")
+        
+        if len(documents) > max_count:
+            raise ValidationError(f"En fazla {max_count} dökümanda arama yapılabilir")
+        
+        if not all(isinstance(document, str) and document.strip() for document in documents):
+            raise ValidationError("Geçersiz döküman adı")
+        
+        return list(dict.fromkeys(document.strip() for document in documents))
+    
+    @staticmethod
+    def validate_tags(tags, max_tags=10, max_len=30):
+        """Virgülle ayrılmış metin veya liste halindeki etiketleri temizler"""
+        if not tags:
+            return []
+        
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        
+        if not isinstance(tags, list):
+            raise ValidationError("Etiketler liste veya virgülle ayrılmış metin olmalı")
+        
+        cleaned = []
+        for tag in tags:
+            tag = str(tag).strip().lower()
+            if not tag:
+                continue
+            if len(tag) > max_len or not re.fullmatch(r'[\w\- ]+', tag):
+                raise ValidationError(f"Geçersiz etiket: {tag[:max_len]}")
+            if tag not in cleaned:
+                cleaned.append(tag)
+        
+        if len(cleaned) > max_tags:
+            raise ValidationError(f"En fazla {max_tags} etiket girilebilir")
+        
+        return cleaned
 
 
 class TextCleaner:
@@ -71,6 +112,39 @@ class TextCleaner:
         
         return text.strip()
     
+    @staticmethod
+    def clean_pdf_pages(text):
+        """
+        clean_pdf_text ile aynı temizliği yapar ve sayfa sınırlarını korur.
+        
+        Returns:
+            Tuple[temiz_metin, [(sayfanın metindeki başlangıç offset'i, sayfa_no), ...]]
+        """
+        if not text:
+            return "", []
+        
+        parts = re.split(r'--- Sayfa (\d+) ---', text)
+        pages = [(None, parts[0])] + [
+            (int(parts[i]), parts[i + 1]) for i in range(1, len(parts) - 1, 2)
+        ]
+        
+        clean_parts = []
+        page_starts = []
+        offset = 0
+        for page_number, page_text in pages:
+            page_text = re.sub(r'\s+', ' ', page_text).strip()
+            if not page_text:
+                continue
+            
+            if clean_parts:
+                offset += 1
+            if page_number is not None:
+                page_starts.append((offset, page_number))
+            clean_parts.append(page_text)
+            offset += len(page_text)
+        
+        return ' '.join(clean_parts), page_starts
+    
     @staticmethod
     def split_into_sentences(text):
         
@@ -109,6 +183,46 @@ class TextCleaner:
             chunks.append(current_chunk.strip())
         
         return chunks
+    
+    @staticmethod
+    def create_chunk_spans(text, chunk_size=500, overlap=100):
+        """
+        create_chunks ile aynı strateji; chunk metinlerini kopyalamak yerine
+        text içindeki (offset, length) aralıklarını döndürür.
+        """
+        if not text:
+            return []
+        
+        sentence_spans = [
+            (match.start(), match.end())
+            for match in re.finditer(r'[^.!?]+[.!?]*', text)
+            if match.group().strip()
+        ]
+        spans = []
+        chunk_start = chunk_end = None
+        
+        for sentence_start, sentence_end in sentence_spans:
+            while text[sentence_start].isspace():
+                sentence_start += 1
+            
+            if chunk_start is not None and sentence_end - chunk_start > chunk_size:
+                spans.append((chunk_start, chunk_end - chunk_start))
+                
+                # Örtüşme: önceki chunk'ın son `overlap` karakteri, kelime sınırına hizalanır
+                overlap_start = max(chunk_start, chunk_end - overlap)
+                if overlap_start > chunk_start and not text[overlap_start - 1].isspace():
+                    word_break = text.find(' ', overlap_start, chunk_end)
+                    overlap_start = word_break + 1 if word_break != -1 else sentence_start
+                chunk_start = overlap_start
+            elif chunk_start is None:
+                chunk_start = sentence_start
+            
+            chunk_end = sentence_end
+        
+        if chunk_start is not None:
+            spans.append((chunk_start, chunk_end - chunk_start))
+        
+        return spans
 
 
 import logging
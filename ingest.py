@@ -0,0 +1,311 @@
+"""
+Toplu PDF içe aktarma aracı.
+
+Bir klasör ağacındaki tüm PDF'leri işlem havuzunda işler, indeksleri
+PROCESSED_FOLDER'a uygulamanın kullandığı formatta yazar ve ilerlemeyi bir
+checkpoint dosyasına kaydeder. Yarıda kalan çalıştırma aynı komutla devam eder.
+
+Kullanım:
+    python ingest.py /arsiv/klasoru --workers 8
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from werkzeug.utils import secure_filename
+
+from config import Config
+from core.pdf_processor import PDFProcessor
+from core.search_engine import SearchEngine
+from core.utils import Validator, setup_logger
+
+logger = setup_logger('ingest')
+
+_processor = None
+
+
+def _init_worker(chunk_size, overlap, verbose):
+    global _processor
+    if not verbose:
+        logging.disable(logging.INFO)
+    _processor = PDFProcessor(chunk_size=chunk_size, overlap=overlap)
+
+
+def document_name(pdf_path, root):
+    """Klasör yapısını koruyan, çakışmayan bir döküman adı üretir"""
+    relative = pdf_path.relative_to(root).with_suffix('')
+    raw_name = '__'.join(relative.parts)
+    name = secure_filename(raw_name)
+    
+    # secure_filename ASCII dışı harfleri siler, boşlukları birleştirir ("Köpek" -> "Kopek");
+    # kayıplı dönüşümde yol özeti eklenerek farklı dosyaların aynı ada düşmesi önlenir
+    if name != raw_name:
+        digest = hashlib.sha1(relative.as_posix().encode('utf-8')).hexdigest()[:8]
+        name = f"{name or 'document'}_{digest}"
+    return name
+
+
+def ingest_file(pdf_path, name, processed_folder, tags):
+    """Tek bir PDF'i işler, indeksler ve kaydeder (işçi süreçte çalışır)"""
+    start_time = time.time()
+    result = {'path': str(pdf_path), 'document': name, 'status': 'failed', 'chunks': 0}
+
+    try:
+        output_path = Path(processed_folder) / f"{name}.pkl"
+        if output_path.exists():
+            existing = _processor.load_processed_document(output_path)
+            owner = getattr(existing, 'source_path', None)
+            if owner != str(pdf_path):
+                result['error'] = f"Döküman adı çakışması: {output_path.name} başka bir kaynağa ait ({owner or 'bilinmiyor'})"
+                return result
+        
+        valid, error = _processor.validate_pdf(pdf_path)
+        if not valid:
+            result['error'] = error
+            return result
+
+        processed_doc, chunk_texts, error = _processor.process_pdf_with_texts(pdf_path, name)
+        if error:
+            result['error'] = error
+            return result
+
+        processed_doc.tags = tags
+        processed_doc.source_path = str(pdf_path)
+        SearchEngine().index_document(processed_doc, chunk_texts)
+
+        if not _processor.save_processed_document(processed_doc, output_path):
+            result['error'] = "İndeks kaydedilemedi"
+            return result
+
+        result['status'] = 'ok'
+        result['chunks'] = processed_doc.get_chunk_count()
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        result['seconds'] = round(time.time() - start_time, 3)
+
+    return result
+
+
+class Checkpoint:
+    """Tamamlanan dosyaları JSON satırları olarak tutar; dosya değişmediyse tekrar işlenmez"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Yarıda kalmış son satır
+                    self.entries[entry['path']] = entry
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def is_done(self, pdf_path, stat, retry_failed=True):
+        entry = self.entries.get(str(pdf_path))
+        if not entry or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime:
+            return False
+        return entry['status'] == 'ok' or not retry_failed
+
+    def record(self, result, stat):
+        entry = dict(result, size=stat.st_size, mtime=stat.st_mtime)
+        self.entries[entry['path']] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def find_pdfs(root):
+    return sorted(path for path in Path(root).rglob('*') if path.suffix.lower() == '.pdf' and path.is_file())
+
+
+def run(args):
+    root = Path(args.directory).resolve()
+    processed_folder = Path(args.output)
+    processed_folder.mkdir(parents=True, exist_ok=True)
+    tags = Validator.validate_tags(args.tags)
+
+    checkpoint = Checkpoint(args.checkpoint)
+    pending = []
+    skipped = rejected = 0
+    
+    # Döküman adı -> sahibi olan kaynak yol; aynı ada düşen ikinci dosya işlenmez
+    owners = {
+        entry['document']: entry['path']
+        for entry in checkpoint.entries.values()
+        if entry['status'] == 'ok' and entry.get('document')
+    }
+    for pdf_path in find_pdfs(root):
+        stat = pdf_path.stat()
+        if checkpoint.is_done(pdf_path, stat, retry_failed=not args.skip_failed):
+            skipped += 1
+            continue
+        
+        name = document_name(pdf_path, root)
+        owner = owners.setdefault(name, str(pdf_path))
+        if owner != str(pdf_path):
+            error = f"Döküman adı çakışması: {name} ({owner})"
+        elif args.max_file_size and stat.st_size > args.max_file_size * 1024 * 1024:
+            error = "Dosya boyutu sınırı aşıldı"
+        else:
+            pending.append((pdf_path, name, stat))
+            continue
+        
+        rejected += 1
+        logger.warning(f"Atlandı: {pdf_path} - {error}")
+        checkpoint.record({'path': str(pdf_path), 'document': name, 'status': 'failed',
+                           'chunks': 0, 'seconds': 0, 'error': error}, stat)
+
+    logger.info(f"{len(pending)} PDF işlenecek, {skipped} PDF checkpoint'ten atlandı, {rejected} PDF reddedildi")
+
+    start_time = time.time()
+    last_report = start_time
+    completed = failed = 0
+    processed_bytes = 0
+
+    def create_executor():
+        return ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=_init_worker,
+            initargs=(args.chunk_size, args.overlap, args.verbose)
+        )
+
+    executor = create_executor()
+    queue = iter(pending)
+    in_flight = {}
+    # Çöken havuzda yarım kalan işler; hangisinin çökerttiği bilinmediği için tek tek denenir
+    suspects = deque()
+
+    # Tamamlanan ya da çöküşte başarısız sayılan, checkpoint'e yazılmayı bekleyen sonuçlar
+    results = []
+
+    def recover(crashed):
+        """Çöken havuzu yeniler; yarıda kalan işler tek tek denenmek üzere suspects'e alınır"""
+        nonlocal executor
+        # Bir işçi süreç öldü (ör. bellek yetersizliği); havuzdaki tüm işler yarıda kalır
+        for future, item in in_flight.items():
+            # Çöküşten önce biten işlerin sonuçları korunur
+            if future.done() and future.exception() is None:
+                results.append((future.result(), item[2]))
+            else:
+                crashed.append(item)
+        in_flight.clear()
+        executor.shutdown(wait=True)
+        executor = create_executor()
+
+        if len(crashed) == 1:
+            pdf_path, name, stat = crashed[0]
+            results.append(({'path': str(pdf_path), 'document': name, 'status': 'failed', 'chunks': 0,
+                             'seconds': 0, 'error': "İşçi süreç beklenmedik şekilde sonlandı"}, stat))
+        elif crashed:
+            logger.warning(f"İşçi süreç sonlandı; yarıda kalan {len(crashed)} PDF tek tek yeniden denenecek")
+            suspects.extend(crashed)
+
+    def submit_next():
+        if suspects:
+            if in_flight:
+                return False
+            item = suspects.popleft()
+        else:
+            item = next(queue, None)
+            if item is None:
+                return False
+        pdf_path, name, stat = item
+        try:
+            future = executor.submit(ingest_file, pdf_path, name, processed_folder, tags)
+        except BrokenProcessPool:
+            # Havuz wait() ile bu çağrı arasında çökmüş; bu iş hiç başlamadı, yenilenen havuzda ilk sırada denenir
+            suspects.appendleft(item)
+            recover([])
+            return submit_next()
+        in_flight[future] = item
+        return True
+
+    def fill():
+        # Bellek kullanımını sınırlamak için aynı anda en fazla workers * 4 iş kuyrukta tutulur
+        while len(in_flight) < args.workers * 4 and submit_next():
+            pass
+
+    fill()
+    try:
+        while in_flight or results:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            crashed = []
+            for future in done:
+                item = in_flight.pop(future)
+                try:
+                    results.append((future.result(), item[2]))
+                except BrokenProcessPool:
+                    crashed.append(item)
+
+            if crashed:
+                recover(crashed)
+            fill()
+
+            for result, stat in results:
+                checkpoint.record(result, stat)
+
+                completed += 1
+                processed_bytes += stat.st_size
+                if result['status'] != 'ok':
+                    failed += 1
+                    logger.warning(f"Başarısız: {result['path']} - {result.get('error')}")
+            results.clear()
+
+            now = time.time()
+            if now - last_report >= args.report_interval:
+                elapsed = now - start_time
+                logger.info(
+                    f"{completed}/{len(pending)} PDF, {failed} hata, "
+                    f"{completed / elapsed:.2f} PDF/s, {processed_bytes / elapsed / 1024 / 1024:.2f} MB/s"
+                )
+                last_report = now
+    except KeyboardInterrupt:
+        logger.warning("Durduruldu; aynı komutla kaldığı yerden devam edilebilir")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        checkpoint.close()
+
+    executor.shutdown()
+
+    elapsed = max(time.time() - start_time, 1e-9)
+    logger.info(
+        f"Tamamlandı: {completed - failed} başarılı, {failed} hata, {skipped} atlandı, "
+        f"{elapsed:.1f}s, {completed / elapsed:.2f} PDF/s, {processed_bytes / elapsed / 1024 / 1024:.2f} MB/s"
+    )
+    return 1 if failed or rejected else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Klasör ağacındaki PDF'leri toplu olarak indeksler")
+    parser.add_argument('directory', help="PDF'lerin bulunduğu kök klasör")
+    parser.add_argument('--output', default=str(Config.PROCESSED_FOLDER), help="İndekslerin yazılacağı klasör")
+    parser.add_argument('--checkpoint', default=str(Config.PROCESSED_FOLDER / 'ingest_checkpoint.jsonl'),
+                        help="İlerleme dosyası (devam etmek için aynı dosya kullanılır)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="İşçi süreç sayısı")
+    parser.add_argument('--chunk-size', type=int, default=Config.CHUNK_SIZE)
+    parser.add_argument('--overlap', type=int, default=Config.CHUNK_OVERLAP)
+    parser.add_argument('--tags', default='', help="Tüm dökümanlara eklenecek virgülle ayrılmış etiketler")
+    parser.add_argument('--max-file-size', type=int, default=0, help="MB cinsinden dosya sınırı (0: sınırsız)")
+    parser.add_argument('--skip-failed', action='store_true', help="Önceki çalıştırmada başarısız olanları tekrar deneme")
+    parser.add_argument('--report-interval', type=float, default=10.0, help="İlerleme raporu aralığı (saniye)")
+    parser.add_argument('--verbose', action='store_true', help="İşçi süreçlerin INFO loglarını göster")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(run(parse_args()))
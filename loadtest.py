@@ -0,0 +1,558 @@
+"""
+Yük testi aracı.
+
+Uygulamayı verilen her sunucu yapılandırmasıyla (işçi süreç x thread sayısı)
+sırayla yerelde başlatır (ya da --url ile verilen sunucuya bağlanır) ve süreç +
+thread havuzundan oluşan sahte istemcilerle /search'e gerçekçi bir sorgu
+karışımı gönderir: Zipf dağılımlı popüler sorgular, sonuç dönmeyen sorgular ve
+500 karaktere kadar uzun sorgular. İsteğe bağlı olarak aynı anda arka planda
+PDF yüklenir. Her yapılandırma için sürdürülebilir QPS, gecikme yüzdelikleri
+ve hata oranları raporlanır.
+
+Yerel sunucu, aynı dinleme soketini paylaşan --workers adet süreçten oluşur;
+her süreç istekleri --threads boyutlu bir thread havuzunda işler. --server-cmd
+ile aynı yapılandırmalar başka bir sunucuyla (ör. gunicorn) denenebilir.
+
+Kullanım:
+    python loadtest.py --workers 1,2,4 --threads 8,16 --duration 60
+    python loadtest.py --workers 2,4 --threads 8 --server-cmd "gunicorn -w {workers} --threads {threads} -b {host}:{port} app:app"
+    python loadtest.py --url http://10.0.0.5:5000 --documents rapor,kitap --upload-pdf ornek.pdf
+"""
+import argparse
+import gzip
+import itertools
+import json
+import logging
+import multiprocessing
+import random
+import shlex
+import socket
+import string
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import numpy as np
+from werkzeug.serving import LISTEN_QUEUE, BaseWSGIServer
+
+from config import Config
+from core.utils import setup_logger
+
+logger = setup_logger('loadtest')
+
+QUERY_CLASSES = ('popular', 'zero_hit', 'long')
+MAX_QUERY_LENGTH = 500  # Validator.validate_search_query sınırı
+
+
+def parse_mix(value):
+    """'popular=0.8,zero_hit=0.1,long=0.1' -> {sınıf: ağırlık}"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in QUERY_CLASSES:
+            raise argparse.ArgumentTypeError(f"Bilinmeyen sorgu sınıfı: {name}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Geçersiz ağırlık: {part}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("En az bir sorgu sınıfının ağırlığı pozitif olmalı")
+    return mix
+
+
+def parse_counts(value):
+    """'1,2,4' -> [1, 2, 4]"""
+    try:
+        counts = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Geçersiz sayı listesi: {value}")
+    if not counts or any(count < 1 for count in counts):
+        raise argparse.ArgumentTypeError("Sayılar pozitif olmalı")
+    return counts
+
+
+def http_request(url, data=None, headers=None, timeout=10.0):
+    """(durum kodu, yanıt başlıkları, gövde) döndürür; HTTP hataları istisna fırlatmaz"""
+    request = Request(url, data=data, headers=headers or {})
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            status, response_headers, body = response.status, response.headers, response.read()
+    except HTTPError as e:
+        status, response_headers, body = e.code, e.headers, e.read()
+
+    if response_headers.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return status, response_headers, body
+
+
+class QueryMix:
+    """Bir istemci thread'inin sorgu üreticisi"""
+
+    def __init__(self, vocabulary, mix, zipf_exponent=1.1, seed=None):
+        self.random = random.Random(seed)
+        self.vocabulary = vocabulary
+        self.classes = list(mix)
+        self.class_weights = [mix[name] for name in self.classes]
+        self.vocabulary_set = set(vocabulary)
+
+        # Sözlük popülerlik sırasında; i. terimin ağırlığı 1 / i^s
+        ranks = np.arange(1, len(vocabulary) + 1, dtype=np.float64)
+        self.cumulative_weights = np.cumsum(1.0 / ranks ** zipf_exponent).tolist()
+
+    def popular(self):
+        terms = self.random.choices(self.vocabulary, cum_weights=self.cumulative_weights, k=self.random.randint(1, 2))
+        return ' '.join(dict.fromkeys(terms))
+
+    def zero_hit(self):
+        # Türkçede geçmeyen harflerden üretilen terimler sözlükte bulunmaz
+        while True:
+            term = ''.join(self.random.choices('qwxzj', k=self.random.randint(6, 12)))
+            if term not in self.vocabulary_set:
+                return term
+
+    def long(self):
+        target = self.random.randint(MAX_QUERY_LENGTH // 2, MAX_QUERY_LENGTH)
+        words = []
+        length = 0
+        while True:
+            if self.random.random() < 0.7:
+                word = self.random.choice(self.vocabulary)
+            else:
+                word = ''.join(self.random.choices(string.ascii_lowercase, k=self.random.randint(3, 10)))
+            if length + len(word) + 1 > target:
+                break
+            words.append(word)
+            length += len(word) + 1
+        return ' '.join(words) or self.popular()
+
+    def next(self):
+        query_class = self.random.choices(self.classes, weights=self.class_weights)[0]
+        return query_class, getattr(self, query_class)()
+
+
+def run_client(base_url, vocabulary, documents, args, seed, end_at, samples):
+    """Kapalı döngü istemci: bir yanıt gelmeden sonraki istek gönderilmez"""
+    query_mix = QueryMix(vocabulary, args.mix, args.zipf, seed)
+    etags = {}
+    headers = {'Accept-Encoding': 'gzip'}
+
+    while time.time() < end_at:
+        query_class, query = query_mix.next()
+        params = {'query': query, 'documents': ','.join(query_mix.random.sample(documents, args.documents_per_query))}
+        if args.omit_preview:
+            params['omit_preview'] = '1'
+        url = f"{base_url}/search?{urlencode(params)}"
+
+        request_headers = dict(headers)
+        if args.revalidate and url in etags:
+            request_headers['If-None-Match'] = etags[url]
+
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            status, response_headers, body = http_request(url, headers=request_headers, timeout=args.timeout)
+            if status == 304:
+                error = None
+            elif status != 200:
+                error = f'http_{status}'
+            elif not json.loads(body).get('success'):
+                error = 'failed'
+            else:
+                error = None
+                if args.revalidate and response_headers.get('ETag'):
+                    etags[url] = response_headers['ETag']
+        except (URLError, OSError, ValueError) as e:
+            error = type(getattr(e, 'reason', e)).__name__
+
+        samples.append((query_class, started_at, time.perf_counter() - start, error))
+
+
+def run_worker(worker_id, base_url, vocabulary, documents, args, end_at):
+    """İstemci süreç: args.client_threads adet istemci thread'i çalıştırır ve örnekleri döndürür"""
+    samples = []
+    clients = [
+        threading.Thread(
+            target=run_client,
+            args=(base_url, vocabulary, documents, args, f'{args.seed}-{worker_id}-{index}', end_at, samples),
+            daemon=True
+        )
+        for index in range(args.client_threads)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return samples
+
+
+def encode_multipart(field, path, fields):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+        )
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{path.name}"\r\n'
+        f'Content-Type: application/pdf\r\n\r\n'.encode('utf-8')
+    )
+    parts.append(path.read_bytes())
+    parts.append(f'\r\n--{boundary}--\r\n'.encode('utf-8'))
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def run_uploader(base_url, args, end_at, samples):
+    """Arama yükü sürerken aynı PDF'i aralıklarla yeniden yükler (indeksleme + ETag değişimi)"""
+    body, content_type = encode_multipart('pdf', Path(args.upload_pdf), {'tags': 'loadtest'})
+
+    while time.time() < end_at:
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            status, _, response_body = http_request(
+                f"{base_url}/upload",
+                data=body,
+                headers={'Content-Type': content_type},
+                timeout=max(args.timeout, 60.0)
+            )
+            if status != 200:
+                error = f'http_{status}'
+            else:
+                error = None if json.loads(response_body).get('success') else 'failed'
+        except (URLError, OSError, ValueError) as e:
+            error = type(getattr(e, 'reason', e)).__name__
+
+        samples.append(('upload', started_at, time.perf_counter() - start, error))
+        time.sleep(max(0.0, min(args.upload_interval, end_at - time.time())))
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """İstekleri sabit boyutlu bir thread havuzunda işleyen werkzeug sunucusu"""
+
+    multithread = True
+
+    def __init__(self, host, port, app, threads, fd=None):
+        super().__init__(host, port, app, fd=fd)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='loadtest-server')
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        if hasattr(self, 'executor'):
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def serve_worker(listener, threads, ready, stop, verbose=False):
+    """Sunucu süreci: uygulamayı yükler, indeksler hazır olunca paylaşılan soketten istek kabul eder"""
+    from app import app, index_registry
+
+    if not verbose:
+        # İstek başına INFO logları ölçümü yavaşlatır
+        names = [name for name in logging.root.manager.loggerDict if name.startswith('core.')]
+        for name in names + ['app', 'werkzeug']:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+    host, port = listener.getsockname()[:2]
+    server = PooledWSGIServer(host, port, app, threads, fd=listener.fileno())
+    # Soket süreçler arasında paylaşılır; bağlantıyı başka süreç kaptığında accept() beklemesin
+    server.socket.setblocking(False)
+    while not index_registry.ready and not stop.is_set():
+        time.sleep(0.1)
+    ready.set()
+
+    threading.Thread(target=server.serve_forever, name='loadtest-server', daemon=True).start()
+    stop.wait()
+    server.shutdown()
+    server.server_close()
+
+
+@contextmanager
+def local_server(host, port, workers, threads, ready_timeout, verbose=False):
+    """
+    workers adet sunucu sürecini aynı dinleme soketiyle başlatır; çekirdek
+    bağlantıları süreçler arasında dağıtır. Tüm süreçler hazır olunca URL verir.
+    """
+    listener = socket.create_server((host, port), backlog=LISTEN_QUEUE)
+    # spawn: sunucu süreçleri shard süreçleri başlatabilmek için daemon değildir
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+    processes = []
+    try:
+        for _ in range(workers):
+            ready = context.Event()
+            process = context.Process(target=serve_worker, args=(listener, threads, ready, stop, verbose))
+            process.start()
+            processes.append((process, ready))
+
+        deadline = time.time() + ready_timeout
+        for process, ready in processes:
+            while not ready.wait(0.5):
+                if not process.is_alive() or time.time() > deadline:
+                    raise RuntimeError("Sunucu süreci hazır olmadı")
+
+        yield f"http://{host}:{listener.getsockname()[1]}"
+    finally:
+        stop.set()
+        for process, _ in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        listener.close()
+
+
+@contextmanager
+def command_server(command, host, port, workers, threads):
+    """--server-cmd şablonundaki sunucuyu başlatır; hazır olması /healthz ile beklenir"""
+    if not port:
+        with socket.socket() as probe:
+            probe.bind((host, 0))
+            port = probe.getsockname()[1]
+
+    argv = shlex.split(command.format(host=host, port=port, workers=workers, threads=threads))
+    process = subprocess.Popen(argv)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def wait_until_ready(base_url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            status, _, _ = http_request(f"{base_url}/healthz", timeout=5.0)
+            if status == 200:
+                return True
+        except (URLError, OSError):
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def local_documents():
+    return sorted(path.stem for path in Config.PROCESSED_FOLDER.glob('*.pkl'))
+
+
+def build_vocabulary(base_url, documents, args):
+    """Popüler sorgular için terim listesi; --queries verilmezse dökümanların en önemli terimleri"""
+    if args.queries:
+        with open(args.queries, encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+
+    vocabulary = []
+    for document in documents:
+        status, _, body = http_request(f"{base_url}/stats?{urlencode({'document': document})}", timeout=args.timeout)
+        data = json.loads(body) if status == 200 else {}
+        if not data.get('success'):
+            logger.warning(f"İstatistik alınamadı: {document}")
+            continue
+        vocabulary.extend(term['term'] for term in data['statistics']['top_terms'])
+
+    return list(dict.fromkeys(vocabulary))
+
+
+def summarize(samples, duration):
+    """Sınıf bazında sayı, QPS, hata oranı ve gecikme yüzdelikleri (ms)"""
+    groups = {}
+    for query_class, _, latency, error in samples:
+        groups.setdefault(query_class, []).append((latency, error))
+    search_samples = [item for name, items in groups.items() if name != 'upload' for item in items]
+    if search_samples:
+        groups['all'] = search_samples
+
+    summary = {}
+    for name, items in groups.items():
+        latencies = np.array([latency for latency, _ in items]) * 1000
+        errors = {}
+        for _, error in items:
+            if error:
+                errors[error] = errors.get(error, 0) + 1
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        summary[name] = {
+            'requests': len(items),
+            'qps': round(len(items) / duration, 2),
+            'error_rate': round(sum(errors.values()) / len(items), 4),
+            'errors': errors,
+            'p50_ms': round(float(p50), 1),
+            'p90_ms': round(float(p90), 1),
+            'p99_ms': round(float(p99), 1),
+            'max_ms': round(float(latencies.max()), 1)
+        }
+    return summary
+
+
+def measure(base_url, vocabulary, documents, args):
+    """Tek bir sunucuya karşı ısınma + ölçüm süresince yük üretir, ölçüm penceresindeki örnekleri döndürür"""
+    start_at = time.time()
+    end_at = start_at + args.warmup + args.duration
+    upload_samples = []
+    uploader = None
+    if args.upload_pdf:
+        uploader = threading.Thread(target=run_uploader, args=(base_url, args, end_at, upload_samples), daemon=True)
+        uploader.start()
+
+    # spawn: istemci süreçleri bu sürecin durumunu kopyalamaz
+    with ProcessPoolExecutor(max_workers=args.clients, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [
+            executor.submit(run_worker, worker_id, base_url, vocabulary, documents, args, end_at)
+            for worker_id in range(args.clients)
+        ]
+        samples = [sample for future in futures for sample in future.result()]
+
+    if uploader:
+        uploader.join()
+        samples.extend(upload_samples)
+
+    measured_from = start_at + args.warmup
+    return [sample for sample in samples if sample[1] >= measured_from]
+
+
+def log_summary(label, summary):
+    logger.info(f"--- {label} ---")
+    for name, row in summary.items():
+        logger.info(
+            f"{name:<9} {row['requests']:>7} istek  {row['qps']:>8.2f} QPS  "
+            f"p50 {row['p50_ms']:>7.1f}ms  p90 {row['p90_ms']:>7.1f}ms  p99 {row['p99_ms']:>7.1f}ms  "
+            f"hata %{row['error_rate'] * 100:.2f} {row['errors'] or ''}"
+        )
+
+
+def run(args):
+    if args.url:
+        configurations = [(None, None)]
+    else:
+        configurations = list(itertools.product(args.workers, args.threads))
+
+    documents = args.documents.split(',') if args.documents else local_documents()
+    if not documents:
+        logger.error("Aranacak döküman yok; --documents verin ya da önce PDF yükleyin")
+        return 1
+    args.documents_per_query = min(args.documents_per_query, len(documents))
+
+    vocabulary = None
+    runs = []
+    for workers, threads in configurations:
+        if args.url:
+            label = args.url
+            server = nullcontext(args.url.rstrip('/'))
+        elif args.server_cmd:
+            label = f"{workers} süreç x {threads} thread"
+            server = command_server(args.server_cmd, args.host, args.port, workers, threads)
+        else:
+            label = f"{workers} süreç x {threads} thread"
+            server = local_server(args.host, args.port, workers, threads, args.ready_timeout, args.verbose)
+
+        try:
+            with server as base_url:
+                if not wait_until_ready(base_url, args.ready_timeout):
+                    logger.error(f"Sunucu hazır değil: {base_url}/healthz")
+                    return 1
+
+                if vocabulary is None:
+                    vocabulary = build_vocabulary(base_url, documents, args)
+                    if not vocabulary:
+                        logger.error("Popüler sorgular için terim bulunamadı")
+                        return 1
+
+                logger.info(
+                    f"Sunucu: {label}; istemci: {args.clients} süreç x {args.client_threads} thread, "
+                    f"{args.duration}s (ısınma {args.warmup}s), {len(documents)} döküman, "
+                    f"{len(vocabulary)} popüler terim"
+                )
+                samples = measure(base_url, vocabulary, documents, args)
+        except RuntimeError as e:
+            logger.error(f"{label}: {e}")
+            return 1
+
+        if not samples:
+            logger.error(f"{label}: ölçüm penceresinde tamamlanan istek yok")
+            return 1
+
+        summary = summarize(samples, args.duration)
+        log_summary(label, summary)
+        runs.append({'url': base_url, 'workers': workers, 'threads': threads, 'summary': summary})
+
+    if len(runs) > 1:
+        logger.info("--- Karşılaştırma (tüm aramalar) ---")
+        for entry in runs:
+            row = entry['summary'].get('all')
+            if row:
+                logger.info(
+                    f"{entry['workers']:>3} süreç x {entry['threads']:>3} thread  {row['qps']:>8.2f} QPS  "
+                    f"p50 {row['p50_ms']:>7.1f}ms  p99 {row['p99_ms']:>7.1f}ms  hata %{row['error_rate'] * 100:.2f}"
+                )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'clients': args.clients,
+                'client_threads': args.client_threads,
+                'duration': args.duration,
+                'mix': args.mix,
+                'server_cmd': args.server_cmd,
+                'runs': runs
+            }, f, ensure_ascii=False, indent=2)
+
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="/search için yük testi")
+    parser.add_argument('--url', help="Hedef sunucu (verilmezse uygulama yerelde başlatılır)")
+    parser.add_argument('--host', default='127.0.0.1', help="Yerel sunucu adresi")
+    parser.add_argument('--port', type=int, default=0, help="Yerel sunucu portu (0: boş port)")
+    parser.add_argument('--workers', type=parse_counts, default=[1],
+                        help="Denenecek sunucu süreç sayıları, ör. 1,2,4")
+    parser.add_argument('--threads', type=parse_counts, default=[8],
+                        help="Denenecek süreç başına sunucu thread sayıları, ör. 8,16")
+    parser.add_argument('--server-cmd',
+                        help="Yerel sunucu yerine çalıştırılacak komut şablonu ({host} {port} {workers} {threads})")
+    parser.add_argument('--clients', type=int, default=2, help="İstemci süreç sayısı")
+    parser.add_argument('--client-threads', type=int, default=4, help="İstemci süreç başına thread sayısı")
+    parser.add_argument('--duration', type=float, default=30.0, help="Ölçüm süresi (saniye)")
+    parser.add_argument('--warmup', type=float, default=5.0, help="Rapora katılmayan ısınma süresi (saniye)")
+    parser.add_argument('--documents', help="Virgülle ayrılmış döküman adları (varsayılan: PROCESSED_FOLDER)")
+    parser.add_argument('--documents-per-query', type=int, default=1, help="Her sorguda aranacak döküman sayısı")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('popular=0.8,zero_hit=0.1,long=0.1'),
+                        help="Sorgu karışımı, ör. popular=0.8,zero_hit=0.1,long=0.1")
+    parser.add_argument('--zipf', type=float, default=1.1, help="Popüler sorgu dağılımının Zipf üssü")
+    parser.add_argument('--queries', help="Popüler sorgular için satır başına bir sorgu içeren dosya")
+    parser.add_argument('--omit-preview', action='store_true', help="Yanıtlardan preview alanını çıkar")
+    parser.add_argument('--revalidate', action='store_true', help="Tekrarlanan sorgularda If-None-Match gönder")
+    parser.add_argument('--upload-pdf', help="Test boyunca arka planda tekrar tekrar yüklenecek PDF")
+    parser.add_argument('--upload-interval', type=float, default=5.0, help="Yüklemeler arası bekleme (saniye)")
+    parser.add_argument('--timeout', type=float, default=10.0, help="İstek zaman aşımı (saniye)")
+    parser.add_argument('--ready-timeout', type=float, default=120.0, help="Sunucunun hazır olmasını bekleme süresi")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Özetin yazılacağı JSON dosyası")
+    parser.add_argument('--verbose', action='store_true', help="Yerel sunucunun INFO loglarını göster")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(run(parse_args()))